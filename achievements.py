@@ -0,0 +1,231 @@
+"""
+Per-player achievement progress in a SQLite database.
+
+Storage is sparse: only achievements with progress are stored, one row per
+(player, achievement), so the database grows with what players actually do
+rather than with players x catalog size, and an answer updates a handful of
+small rows in a single transaction. The catalog (ids and max_progress) stays
+in code and is passed in; reads materialize every other achievement from it
+as locked with no progress, and a change that brings an achievement back to
+that default deletes its row.
+
+Game code reports what happened as events, e.g. record_events(player,
+[("correct", 1), ("streak", 10)]); EVENT_RULES maps each event kind to the
+achievements it advances, and one interaction loads the player's rows once,
+evaluates every rule in memory and writes the changed rows back in the same
+transaction.
+
+The database runs in WAL mode with synchronous=NORMAL: a commit appends its
+pages to the write-ahead log and fsyncs happen in batches at checkpoints,
+and SQLite replays the log on open after a crash. With snapshot_path set, a
+compacted copy (VACUUM INTO) replaces the previous snapshot on the first
+write and then at most every snapshot_interval seconds.
+
+The first time a store is opened next to an existing achievements.json the
+JSON's non-default entries are copied in once; the migration is recorded in
+the database so it is not repeated. Default rows kept by older versions of
+the store are dropped once when it is opened.
+
+Usage:
+  store = AchievementStore("achievements.sqlite", ACHIEVEMENTS, legacy_path="achievements.json")
+  store.record_events("Player", [("game_start", "Speed Round"), ("first_game", 1)])
+  store.record_events("Player", [("correct", 1), ("streak", 5)])
+  store.player("Player")["correct_10"]  # {"unlocked": False, "progress": 1, "max": 10, "unlocked_date": None}
+"""
+
+import os
+import json
+import time
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+STORE_FILE = "achievements.sqlite"
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+BUSY_TIMEOUT = 10.0
+SNAPSHOT_INTERVAL = 600.0
+
+# Event kind -> [(achievement id prefix, rule)]. A rule gets the event value and
+# the catalog entry and returns (increment, force_progress), or None to skip it.
+EVENT_RULES = {
+    "correct": [("correct_", lambda n, ach: (n, None))],
+    "streak": [("streak_", lambda n, ach: (0, ach["max_progress"]) if n >= ach["max_progress"] else None)],
+    "game_start": [("games_", lambda mode, ach: (1, None))],
+    "first_game": [("newbie", lambda _, ach: (0, 1))],
+    "perfect_score": [("perfectionist", lambda _, ach: (0, 1))],
+}
+
+
+class AchievementStore:
+    """Achievement rows for all players; update() applies a list of changes in one transaction."""
+
+    def __init__(self, path, catalog, legacy_path=None, snapshot_path=None, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_time = None
+        self.catalog = {ach["id"]: ach for ach in catalog}
+        self._rules = {
+            kind: [(ach, rule) for prefix, rule in rules for ach in catalog if ach["id"].startswith(prefix)]
+            for kind, rules in EVENT_RULES.items()
+        }
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS achievements (player TEXT NOT NULL, id TEXT NOT NULL, "
+                "progress INTEGER NOT NULL DEFAULT 0, unlocked INTEGER NOT NULL DEFAULT 0, unlocked_date TEXT, "
+                "PRIMARY KEY (player, id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            if legacy_path and os.path.exists(legacy_path):
+                self._migrate(conn, legacy_path)
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'sparse'").fetchone() is None:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DELETE FROM achievements WHERE progress = 0 AND unlocked = 0 AND unlocked_date IS NULL")
+                conn.execute("INSERT OR IGNORE INTO meta VALUES ('sparse', '1')")
+                conn.execute("COMMIT")
+
+    def _connect(self):
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _migrate(self, conn, legacy_path):
+        """Copy achievements.json into the store unless that has been done before."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone() is None:
+                try:
+                    with open(legacy_path, "r", encoding="utf-8") as f:
+                        legacy = json.load(f)
+                except (OSError, ValueError):
+                    legacy = {}
+                rows = [
+                    (player, ach_id, int(data.get("progress", 0)), int(bool(data.get("unlocked"))), data.get("unlocked_date"))
+                    for player, achs in legacy.items() for ach_id, data in achs.items()
+                ]
+                rows = [row for row in rows if not self._is_default(*row[2:])]
+                conn.executemany("INSERT OR IGNORE INTO achievements VALUES (?, ?, ?, ?, ?)", rows)
+                conn.execute("INSERT INTO meta VALUES ('migrated_from', ?)", (os.path.abspath(legacy_path),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _is_default(progress, unlocked, unlocked_date):
+        return not progress and not unlocked and unlocked_date is None
+
+    def _default(self, ach_id):
+        return {"unlocked": False, "progress": 0, "max": self.catalog[ach_id]["max_progress"], "unlocked_date": None}
+
+    def _load(self, conn, player):
+        state = {ach_id: self._default(ach_id) for ach_id in self.catalog}
+        for ach_id, progress, unlocked, date in conn.execute(
+                "SELECT id, progress, unlocked, unlocked_date FROM achievements WHERE player = ?", (player,)):
+            if ach_id in state:
+                state[ach_id].update(progress=progress, unlocked=bool(unlocked), unlocked_date=date)
+        return state
+
+    def players(self):
+        """Names of every player with progress on at least one achievement."""
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT player FROM achievements ORDER BY player")]
+
+    def player(self, player):
+        """{achievement id: {"unlocked", "progress", "max", "unlocked_date"}} for every catalog entry."""
+        with closing(self._connect()) as conn:
+            return self._load(conn, player)
+
+    @staticmethod
+    def _apply(data, increment=1, force_progress=None):
+        """Advance one achievement the way the game always has; True if it changed."""
+        if data["unlocked"]:
+            return False
+        old = data["progress"]
+        data["progress"] = force_progress if force_progress is not None else old + increment
+        if data["progress"] == old:
+            return False
+        if data["progress"] >= data["max"]:
+            data["unlocked"] = True
+            data["unlocked_date"] = datetime.now().strftime(DATE_FORMAT)
+        return True
+
+    def _apply_collective(self, state, changed):
+        """Collector / completionist / myth, which count the player's unlocked achievements."""
+        unlocked = sum(1 for data in state.values() if data["unlocked"])
+        total = len(self.catalog)
+        collector = state.get("collector")
+        if collector is not None:
+            progress = min(unlocked, collector["max"])
+            if progress > collector["progress"] and self._apply(collector, force_progress=progress):
+                changed.add("collector")
+        for ach_id in ("completionist", "myth"):
+            if ach_id in state and unlocked >= total and self._apply(state[ach_id], force_progress=total):
+                changed.add(ach_id)
+
+    def update(self, player, changes, collective=True):
+        """
+        Apply changes, a list of (achievement id, increment, force_progress),
+        to player's achievements in one transaction, then the collector /
+        completionist / myth checks unless collective is False. Unknown ids
+        are ignored. Returns the ids that were unlocked by this call.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                state = self._load(conn, player)
+                changed = set()
+                for ach_id, increment, force_progress in changes:
+                    if ach_id in state and self._apply(state[ach_id], increment, force_progress):
+                        changed.add(ach_id)
+                if changed and collective:
+                    self._apply_collective(state, changed)
+                rows = [(player, ach_id, state[ach_id]["progress"], int(state[ach_id]["unlocked"]), state[ach_id]["unlocked_date"])
+                        for ach_id in changed]
+                conn.executemany(
+                    "INSERT INTO achievements VALUES (?, ?, ?, ?, ?) ON CONFLICT (player, id) DO UPDATE SET "
+                    "progress = excluded.progress, unlocked = excluded.unlocked, unlocked_date = excluded.unlocked_date",
+                    [row for row in rows if not self._is_default(*row[2:])]
+                )
+                conn.executemany("DELETE FROM achievements WHERE player = ? AND id = ?",
+                                 [row[:2] for row in rows if self._is_default(*row[2:])])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if changed:
+            self._maybe_snapshot()
+        return sorted(ach_id for ach_id in changed if state[ach_id]["unlocked"])
+
+    def snapshot(self, path):
+        """Write a compacted, self-contained copy of the database to path (atomically replaced)."""
+        tmp = f"{path}.tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        with closing(self._connect()) as conn:
+            conn.execute("VACUUM INTO ?", (tmp,))
+        os.replace(tmp, path)
+
+    def _maybe_snapshot(self):
+        now = time.monotonic()
+        if self.snapshot_path and (self._snapshot_time is None or now - self._snapshot_time >= self.snapshot_interval):
+            self._snapshot_time = now
+            self.snapshot(self.snapshot_path)
+
+    def record_events(self, player, events):
+        """
+        Apply every rule triggered by events, a list of (kind, value) such as
+        ("correct", 1), ("streak", n) or ("game_start", mode), in one
+        update(). Returns the ids unlocked by them.
+        """
+        changes = []
+        for kind, value in events:
+            if kind not in self._rules:
+                raise ValueError(f"Unknown achievement event '{kind}'. Choose from: {', '.join(EVENT_RULES)}")
+            for ach, rule in self._rules[kind]:
+                change = rule(value, ach)
+                if change is not None:
+                    changes.append((ach["id"], *change))
+        return self.update(player, changes) if changes else []
@@ -1,14 +1,19 @@
 import os
-import pickle
+import math
 import random
 import time
 import streamlit as st
 import pandas as pd
 import numpy as np
 import re
-import json
-import shutil
-from datetime import datetime
+from functools import partial
+from detector import load_detector, MAX_TEXT_LENGTH
+from achievements import AchievementStore
+from journal import JournaledDict
+from leaderboard import Leaderboard
+from features import feature_mode
+from jobs import JOBS_DIR, JobManager
+from result_store import SORT_COLUMNS
 
 # -----------------------------
 # Page Config
@@ -25,21 +30,42 @@ st.set_page_config(
 # -----------------------------
 VECTOR_PATH = "vectorizer.pkl"
 MODEL_PATH = "fake_news_model.pkl"
+ARTIFACT_DIR = "model_artifact"  # memory-mapped export from train_model.py / artifact.py
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))  # 0 disables the cache
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "1"))  # >1 scores CSV uploads in worker processes
+BATCH_JOBS_DIR = os.getenv("BATCH_JOBS_DIR", JOBS_DIR)
+JOB_POLL_SECONDS = 1.0
+PREVIEW_CLUSTERS = 50
+RESULT_LABELS = ["FAKE", "REAL", "ERROR"]
+RESULT_DOWNLOADS = {
+    "csv": ("Download CSV", "text/csv"),
+    "parquet": ("Download Parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Download Arrow", "application/vnd.apache.arrow.file"),
+}
 
 # Check model files exist
-if not os.path.exists(VECTOR_PATH) or not os.path.exists(MODEL_PATH):
-    st.error("🚨 Model files not found! Please ensure `vectorizer.pkl` and `fake_news_model.pkl` are in the application directory.")
+has_artifact = os.path.isdir(ARTIFACT_DIR)
+if not has_artifact and (not os.path.exists(VECTOR_PATH) or not os.path.exists(MODEL_PATH)):
+    st.error("🚨 Model files not found! Please ensure `vectorizer.pkl` and `fake_news_model.pkl` (or a `model_artifact/` export) are in the application directory.")
     st.stop()
 
 @st.cache_resource
 def load_model():
-    with open(VECTOR_PATH, "rb") as f:
-        vectorizer = pickle.load(f)
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return vectorizer, model
+    """Memory-map the pickle-free artifact when present, otherwise unpickle the model files."""
+    return load_detector(VECTOR_PATH, MODEL_PATH, ARTIFACT_DIR if has_artifact else None,
+                         cache_size=PREDICTION_CACHE_SIZE)
 
-vectorizer, model = load_model()
+detector = load_model()
+vectorizer, model = detector.vectorizer, detector.model
+
+@st.cache_resource
+def load_job_manager():
+    """One background job runner per server; jobs interrupted by a restart resume from their checkpoint."""
+    manager = JobManager(detector, BATCH_JOBS_DIR, workers=BATCH_WORKERS)
+    manager.resume_pending()
+    return manager
+
+job_manager = load_job_manager()
 
 # -----------------------------
 # Variables
@@ -47,6 +73,15 @@ vectorizer, model = load_model()
 CLASS_LABELS = {0: "FAKE", 1: "REAL"}
 COLOR_MAP = {"FAKE": "#ff4b4b", "REAL": "#00d26a"}
 
+# How the Single News tab scores articles longer than MAX_TEXT_LENGTH
+LONG_ARTICLE_MODES = {
+    "length_weighted": "Windows weighted by length",
+    "mean": "Average of windows",
+    "median": "Median window",
+    "most_fake": "Most suspicious window",
+    None: "Truncate to first 1000 characters",
+}
+
 # Headline pools
 EASY_HEADLINES = [
     "Breaking: You won't believe what happened in the USA!!!",
@@ -94,6 +129,40 @@ EXPERT_HEADLINES = [
 
 ALL_HEADLINES = EASY_HEADLINES + MEDIUM_HEADLINES + HARD_HEADLINES + EXPERT_HEADLINES
 
+BOOTH_CSV_FILES = ["booth_samples.csv", "auto_booth_combined.csv"]
+
+@st.cache_data
+def read_booth_csv(path, mtime):
+    """Headlines from a booth CSV ('text' column). mtime is part of the cache key so edits are picked up."""
+    df = pd.read_csv(path)
+    if "text" not in df.columns:
+        return []
+    return df["text"].dropna().astype(str).str.strip().tolist()
+
+def load_booth_headlines():
+    headlines = []
+    for path in BOOTH_CSV_FILES:
+        if os.path.exists(path):
+            headlines.extend(read_booth_csv(path, os.path.getmtime(path)))
+    return list(dict.fromkeys(h for h in headlines if h))
+
+BOOTH_HEADLINES = load_booth_headlines()
+
+@st.cache_resource
+def load_headline_table(pools):
+    """Score every headline pool once. A changed pool is a new cache key, so the table is rebuilt."""
+    return detector.build_headline_table(dict(pools))
+
+headline_table = load_headline_table((
+    ("easy", tuple(EASY_HEADLINES)),
+    ("medium", tuple(MEDIUM_HEADLINES)),
+    ("hard", tuple(HARD_HEADLINES)),
+    ("expert", tuple(EXPERT_HEADLINES)),
+    ("booth", tuple(BOOTH_HEADLINES)),
+))
+# Only headlines the table scored; it rejects booth rows that fail clean_text
+AUTO_BOOTH_HEADLINES = [h for h in dict.fromkeys(ALL_HEADLINES + BOOTH_HEADLINES) if h in headline_table]
+
 HINTS = [
     "🔍 Check unusual words!",
     "🎯 Pattern seems suspicious!",
@@ -101,9 +170,12 @@ HINTS = [
     "⚠️ Heuristic detects clickbait!"
 ]
 
-LEADERBOARD_FILE = "leaderboard.json"
-ACHIEVEMENTS_FILE = "achievements.json"
+LEADERBOARD_FILE = "leaderboard.json"  # legacy store, imported into the journal once
+LEADERBOARD_JOURNAL = "leaderboard"  # leaderboard.snapshot.json + leaderboard.journal
+ACHIEVEMENTS_FILE = "achievements.json"  # legacy store, migrated into ACHIEVEMENTS_DB once
+ACHIEVEMENTS_DB = "achievements.sqlite"
 BACKUP_DIR = "backups"
+ACHIEVEMENTS_SNAPSHOT = os.path.join(BACKUP_DIR, "achievements.snapshot.sqlite")
 
 os.makedirs(BACKUP_DIR, exist_ok=True)
 
@@ -324,6 +396,13 @@ ACHIEVEMENTS.extend([
     }
 ])
 
+@st.cache_resource
+def load_achievement_store():
+    return AchievementStore(ACHIEVEMENTS_DB, ACHIEVEMENTS, legacy_path=ACHIEVEMENTS_FILE,
+                            snapshot_path=ACHIEVEMENTS_SNAPSHOT)
+
+achievement_store = load_achievement_store()
+
 # -----------------------------
 # Modern Styles (CSS) – responsive & robust
 # -----------------------------
@@ -565,213 +644,79 @@ st.markdown("""
 # Improved Helper Functions
 # -----------------------------
 
-@st.cache_data(ttl=3600)
 def cached_analyze(text):
-    """Cached version for repeated headlines (e.g., game pools)."""
-    X = vectorizer.transform([text])
-    prob = model.predict_proba(X)[0][1]
-    pred = 1 if prob >= 0.5 else 0
-    return CLASS_LABELS[pred], prob
-
-def analyze_text(text):
-    """Robust analysis with user-friendly error handling."""
+    """Quick (label, prob) for game and booth headlines: a lookup in the pre-scored table, else the LRU cache."""
+    row = headline_table.get(text)
+    if row is not None:
+        return row.label, row.prob
+    return detector.analyze(text)
+
+def analyze_text(text, long_strategy=None):
+    """
+    Robust analysis with user-friendly error handling. Returns an AnalysisResult or None.
+    long_strategy scores long articles window by window instead of truncating them.
+    """
     try:
-        text = str(text).strip()
-        if not text:
-            st.warning("⚠️ Please enter some text to analyze.")
-            return None, None
-        if len(text) < 5:
-            st.warning("⚠️ Text is too short. Please enter at least 5 characters.")
-            return None, None
-        if len(text) > 1000:
-            text = text[:1000]
-            st.info("ℹ️ Text truncated to 1000 characters for performance.")
-        X = vectorizer.transform([text])
-        prob = model.predict_proba(X)[0][1]
-        pred = 1 if prob >= 0.5 else 0
-        return CLASS_LABELS[pred], prob
+        result, error = detector.analyze_full(text, long_strategy=long_strategy)
+        if error:
+            st.warning(f"⚠️ {error}")
+            return None
+        if result.windows:
+            st.info(f"ℹ️ Long article scored in {len(result.windows)} windows ({LONG_ARTICLE_MODES[long_strategy]}).")
+        elif len(str(text).strip()) > MAX_TEXT_LENGTH:
+            st.info(f"ℹ️ Text truncated to {MAX_TEXT_LENGTH} characters for performance.")
+        return result
     except Exception as e:
         st.error(f"❌ An error occurred during analysis: {str(e)}")
-        return None, None
+        return None
 
-def explain_fake(text, top_n=5):
-    try:
-        X = vectorizer.transform([text])
-        coef = model.coef_[0]
-        feature_names = vectorizer.get_feature_names_out()
-        indices = X.nonzero()[1]
-        word_scores = {feature_names[i]: coef[i]*X[0,i] for i in indices}
-        top_words = sorted(word_scores.items(), key=lambda x: abs(x[1]), reverse=True)[:top_n]
-        return [w for w,s in top_words if s<0]
-    except:
-        return []
+def explain_fake(result, top_n=5):
+    return result.fake_words(top_n)
 
-def highlight_suspicious(text):
-    ml_words = explain_fake(text)
+def highlight_suspicious(result):
+    ml_words = {w.lower() for w in explain_fake(result)}
     def repl(match):
         word = match.group(0)
-        if word.lower() in [w.lower() for w in ml_words]:
+        if word.lower() in ml_words:
             return f"<span class='suspicious' title='ML signal: contributes to FAKE'>{word}</span>"
         return word
-    return re.sub(r'\b\w+\b', repl, text, flags=re.IGNORECASE)
+    return re.sub(r'\b\w+\b', repl, result.text, flags=re.IGNORECASE)
 
-def explain_reasoning(text, top_n=5):
-    reasons = []
-    try:
-        X = vectorizer.transform([text])
-        if hasattr(model,"coef_"):
-            coef = model.coef_[0]
-            feature_names = vectorizer.get_feature_names_out()
-            indices = X.nonzero()[1]
-            word_scores = {feature_names[i]: coef[i]*X[0,i] for i in indices}
-            top_words = sorted(word_scores.items(), key=lambda x: abs(x[1]), reverse=True)[:top_n]
-            for word, score in top_words:
-                if score < 0:
-                    reasons.append(f"🔴 ML indicates '{word}' contributes to FAKE")
-                else:
-                    reasons.append(f"🟢 ML indicates '{word}' contributes to REAL")
-    except:
-        pass
-    if "!!!" in text or text.isupper():
-        reasons.append("⚠️ Heuristic: Excessive punctuation or all-caps detected")
-    clickbait_words = ["shocking","unbelievable","you won't believe"]
-    for w in clickbait_words:
-        if w.lower() in text.lower():
-            reasons.append(f"🎯 Heuristic: Clickbait word detected '{w}'")
-    return reasons
+def explain_reasoning(result, top_n=5):
+    return result.reasons(top_n)
+
+def read_result_file(path):
+    with open(path, "rb") as f:
+        return f.read()
 
 # -----------------------------
-# JSON backup functions
+# Leaderboard persistence
 # -----------------------------
-def backup_json(file_path):
-    """Create a timestamped backup of a JSON file."""
-    if os.path.exists(file_path):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = os.path.join(BACKUP_DIR, f"{os.path.basename(file_path)}.{timestamp}.bak")
-        shutil.copy(file_path, backup_name)
-        # Keep only last 5 backups to avoid clutter
-        backups = sorted([f for f in os.listdir(BACKUP_DIR) if f.startswith(os.path.basename(file_path))])
-        for old in backups[:-5]:
-            os.remove(os.path.join(BACKUP_DIR, old))
-
+@st.cache_resource
 def load_leaderboard():
-    if os.path.exists(LEADERBOARD_FILE):
-        try:
-            with open(LEADERBOARD_FILE,"r") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def save_leaderboard(board):
-    backup_json(LEADERBOARD_FILE)
-    with open(LEADERBOARD_FILE,"w") as f:
-        json.dump(board, f, indent=2)
-
-# ==================== FIXED load_achievements FUNCTION ====================
+    """Scores in a snapshot plus append-only journal, ranked in memory for rendering."""
+    return Leaderboard(JournaledDict(LEADERBOARD_JOURNAL, legacy_path=LEADERBOARD_FILE))
+
+leaderboard = load_leaderboard()
+
+def save_high_score(player_name, score):
+    """Record score as player_name's best if it beats the stored one; True when it did."""
+    return leaderboard.submit(player_name, score)
+
 def load_achievements(player_name):
-    """Load achievements for a player, ensuring all achievements exist."""
-    if os.path.exists(ACHIEVEMENTS_FILE):
-        with open(ACHIEVEMENTS_FILE, "r") as f:
-            all_achievements = json.load(f)
-    else:
-        all_achievements = {}
-    
-    # Ensure player entry exists
-    if player_name not in all_achievements:
-        all_achievements[player_name] = {}
-    
-    player_data = all_achievements[player_name]
-    modified = False
-    
-    # Add any missing achievements from the master list
-    for ach in ACHIEVEMENTS:
-        ach_id = ach["id"]
-        if ach_id not in player_data:
-            player_data[ach_id] = {
-                "unlocked": False,
-                "progress": 0,
-                "max": ach["max_progress"],
-                "unlocked_date": None
-            }
-            modified = True
-        else:
-            # Optional: update max value if it changed (rare)
-            if player_data[ach_id]["max"] != ach["max_progress"]:
-                player_data[ach_id]["max"] = ach["max_progress"]
-                modified = True
-    
-    if modified:
-        save_achievements(all_achievements)
-    
-    return player_data
-# ===========================================================================
-
-def save_achievements(all_achievements):
-    backup_json(ACHIEVEMENTS_FILE)
-    with open(ACHIEVEMENTS_FILE, "w") as f:
-        json.dump(all_achievements, f, indent=2)
-
-def update_achievement(player_name, ach_id, increment=1, force_progress=None, skip_collective=False):
-    """Update a single achievement and optionally trigger collective checks."""
-    if os.path.exists(ACHIEVEMENTS_FILE):
-        with open(ACHIEVEMENTS_FILE, "r") as f:
-            all_achs = json.load(f)
-    else:
-        all_achs = {}
-    if player_name not in all_achs:
-        # If player missing, we'll use load_achievements to populate properly
-        load_achievements(player_name)  # this will create entry and save
-        with open(ACHIEVEMENTS_FILE, "r") as f:
-            all_achs = json.load(f)
-    if ach_id in all_achs[player_name]:
-        ach_data = all_achs[player_name][ach_id]
-        if not ach_data["unlocked"]:
-            old_progress = ach_data["progress"]
-            if force_progress is not None:
-                ach_data["progress"] = force_progress
-            else:
-                ach_data["progress"] += increment
-            # Only save and check collective if progress actually changed
-            if ach_data["progress"] != old_progress:
-                if ach_data["progress"] >= ach_data["max"]:
-                    ach_data["unlocked"] = True
-                    ach_data["unlocked_date"] = datetime.now().strftime("%Y-%m-%d %H:%M")
-                save_achievements(all_achs)
-                if not skip_collective:
-                    check_collective_achievements(player_name, all_achs)
-    else:
-        # Achievement ID not found – ignore (shouldn't happen)
-        pass
-
-def check_collective_achievements(player_name, all_achs=None):
-    """Check and update collector, completionist, myth achievements."""
-    if all_achs is None:
-        with open(ACHIEVEMENTS_FILE, "r") as f:
-            all_achs = json.load(f)
-    player_achs = all_achs[player_name]
-    unlocked_count = sum(1 for a in player_achs.values() if a["unlocked"])
-    total_achievements = len(ACHIEVEMENTS)
-    # Collector (unlock 10 achievements)
-    if not player_achs["collector"]["unlocked"]:
-        new_progress = min(unlocked_count, player_achs["collector"]["max"])
-        if new_progress > player_achs["collector"]["progress"]:
-            update_achievement(player_name, "collector", force_progress=new_progress, skip_collective=True)
-    # Completionist (unlock all achievements)
-    if not player_achs["completionist"]["unlocked"] and unlocked_count >= total_achievements:
-        update_achievement(player_name, "completionist", force_progress=total_achievements, skip_collective=True)
-    # Myth (unlock all achievements including these)
-    if not player_achs["myth"]["unlocked"] and unlocked_count >= total_achievements:
-        update_achievement(player_name, "myth", force_progress=total_achievements, skip_collective=True)
+    """Achievement progress for a player, with every catalog entry present."""
+    return achievement_store.player(player_name)
+
+def record_events(player_name, events):
+    """Apply a list of (kind, value) achievement events, e.g. [("correct", 1), ("streak", 5)], in one transaction."""
+    return achievement_store.record_events(player_name, events)
 
 # -----------------------------
 # Global helper for correct‑answer achievements
 # -----------------------------
 def on_correct_answer(player_name):
     """Call this whenever a player answers correctly."""
-    for ach in ACHIEVEMENTS:
-        if ach["id"].startswith("correct_"):
-            update_achievement(player_name, ach["id"], increment=1, skip_collective=False)
+    record_events(player_name, [("correct", 1)])
 
 # -----------------------------
 # Game UI Helpers (refactored)
@@ -836,6 +781,9 @@ if "total_games_played" not in st.session_state:
     st.session_state.total_games_played = 0
 if "player_name" not in st.session_state:
     st.session_state.player_name = "Player"
+if "batch_jobs" not in st.session_state:
+    # Background jobs submitted from this browser (newest first); other users' jobs are never listed
+    st.session_state.batch_jobs = [job_id for job_id in st.query_params.get_all("job") if JobManager.valid_id(job_id)]
 
 # Original Mind-Game
 if "mind_index" not in st.session_state:
@@ -945,12 +893,16 @@ st.markdown("""
 
 with st.sidebar:
     st.markdown("### 📊 Model Information")
-    st.info("**Algorithm:** Logistic Regression\n\n**Features:** TF-IDF Vectorization\n\n**Accuracy:** Trained on thousands of articles")
+    st.info(f"**Algorithm:** Logistic Regression\n\n**Features:** {feature_mode(vectorizer)}\n\n**Accuracy:** Trained on thousands of articles")
+    cache_stats = detector.cache.stats()
+    st.caption(f"Prediction cache: {cache_stats['size']}/{cache_stats['maxsize']} entries • "
+               f"{cache_stats['hits']} hits • {cache_stats['misses']} misses • "
+               f"{cache_stats['evictions']} evictions ({cache_stats['hit_rate']*100:.0f}% hit rate)")
     st.markdown("---")
     st.markdown("### 🎯 Quick Stats")
-    board = load_leaderboard()
-    if board:
-        top_player = max(board.items(), key=lambda x: x[1]["score"])
+    top = leaderboard.top(1)
+    if top:
+        top_player = top[0]
         st.success(f"**Top Player**\n\n{top_player[0]}\n\n{top_player[1]['score']} points")
     else:
         st.warning("No records yet!")
@@ -972,6 +924,12 @@ with tab1:
         st.markdown("<div class='main-card'>", unsafe_allow_html=True)
         st.markdown("### 📰 Analyze News Article")
         news_text = st.text_area("Paste your news headline or article here:", height=200, placeholder="Enter the news text you want to verify...")
+        long_strategy = st.selectbox(
+            "Long articles:",
+            list(LONG_ARTICLE_MODES),
+            format_func=LONG_ARTICLE_MODES.get,
+            help=f"How to score text longer than {MAX_TEXT_LENGTH} characters."
+        )
         analyze_btn = st.button("🔍 Analyze Now", use_container_width=True, type="primary")
         st.markdown("</div>", unsafe_allow_html=True)
     with col2:
@@ -981,10 +939,11 @@ with tab1:
         st.markdown("</div>", unsafe_allow_html=True)
     if analyze_btn and news_text.strip():
         with st.spinner("AI is analyzing..."):
-            pred, prob = analyze_text(news_text)
+            analysis = analyze_text(news_text, long_strategy)
             time.sleep(0.5)
-        if pred is None:
+        if analysis is None:
             st.stop()
+        pred, prob = analysis.label, analysis.prob
         result_class = "fake" if pred == "FAKE" else "real"
         st.markdown(f"""
         <div class='prediction-box {result_class}'>
@@ -1004,15 +963,24 @@ with tab1:
         if pred == "FAKE":
             st.markdown("### 🔍 Suspicious Words Detected")
             st.markdown("<div class='main-card'>", unsafe_allow_html=True)
-            st.markdown(highlight_suspicious(news_text), unsafe_allow_html=True)
+            st.markdown(highlight_suspicious(analysis), unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
-        reasons = explain_reasoning(news_text)
+        reasons = explain_reasoning(analysis)
         if reasons:
             st.markdown("### 🧠 AI Analysis Reasoning")
             st.markdown("<div class='reasoning-box'>", unsafe_allow_html=True)
             for r in reasons:
                 st.markdown(f"<div class='reasoning-item'>{r}</div>", unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
+        if analysis.windows:
+            with st.expander(f"📑 Per-window scores ({len(analysis.windows)} windows)"):
+                st.dataframe(pd.DataFrame([{
+                    "window": i + 1,
+                    "characters": f"{w.start}–{w.end}",
+                    "prediction": "REAL" if w.prob >= 0.5 else "FAKE",
+                    "confidence": f"{w.prob*100:.1f}%",
+                    "excerpt": analysis.text[w.start:w.end][:80] + "..."
+                } for i, w in enumerate(analysis.windows)]), use_container_width=True, hide_index=True)
 
 # -----------------------------
 # CSV/Batch
@@ -1022,46 +990,118 @@ with tab2:
     st.markdown("### 📊 Batch Analysis")
     st.info("Upload a CSV file with a 'text' column containing news articles to analyze multiple items at once.")
     uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+    opt1, opt2 = st.columns(2)
+    with opt1:
+        group_near_duplicates = st.checkbox("🧬 Group near-duplicate articles",
+                                            help="Cluster reworded copies of the same story with MinHash/LSH.")
+    with opt2:
+        score_representatives = st.checkbox("Score one article per group", disabled=not group_near_duplicates,
+                                            help="Members of a group reuse the verdict of its first article.")
     if uploaded_file:
-        df = pd.read_csv(uploaded_file)
-        if 'text' not in df.columns:
-            st.error("❌ CSV must have a 'text' column!")
-        else:
-            with st.spinner("Analyzing articles..."):
-                results = []
-                progress_bar = st.progress(0)
-                for idx, row in df.iterrows():
-                    pred, prob = analyze_text(row['text'])
-                    if pred is None:
-                        pred = "ERROR"
-                        prob = 0.0
-                    results.append({
-                        "text": row['text'][:100] + "..." if len(row['text']) > 100 else row['text'],
-                        "prediction": pred,
-                        "confidence": f"{prob*100:.1f}%" if prob is not None else "N/A"
-                    })
-                    progress_bar.progress((idx + 1) / len(df))
-                df_result = pd.DataFrame(results)
-                col1, col2, col3 = st.columns(3)
-                fake_count = len(df_result[df_result['prediction'] == 'FAKE'])
-                real_count = len(df_result[df_result['prediction'] == 'REAL'])
-                error_count = len(df_result[df_result['prediction'] == 'ERROR'])
-                with col1:
-                    st.metric("Total Articles", len(df_result))
-                with col2:
-                    st.metric("Fake News", fake_count, delta=None, delta_color="inverse")
-                with col3:
-                    st.metric("Real News", real_count, delta=None)
-                if error_count > 0:
-                    st.warning(f"{error_count} articles could not be analyzed.")
-                st.markdown("### 📋 Results")
-                st.dataframe(df_result, use_container_width=True, height=400)
-                csv_data = df_result.to_csv(index=False).encode('utf-8')
+        batch_key = (uploaded_file.file_id, group_near_duplicates, group_near_duplicates and score_representatives)
+        if st.session_state.get("batch_job_key") != batch_key:
+            try:
+                uploaded_file.seek(0)
+                st.session_state.batch_job = job_manager.submit(
+                    uploaded_file, uploaded_file.name, clusters=group_near_duplicates, representatives=batch_key[2]
+                )
+                st.session_state.batch_job_key = batch_key
+                st.session_state.batch_jobs.insert(0, st.session_state.batch_job)
+                st.query_params["job"] = st.session_state.batch_jobs
+            except ValueError as e:
+                st.error(f"❌ {e}")
+
+    # Only this browser's own jobs, kept in the URL so they survive a page reload
+    recent_jobs = {job_id: job for job_id in st.session_state.batch_jobs
+                   if (job := job_manager.status(job_id)) is not None}
+    if recent_jobs:
+        with st.expander(f"🗂️ Background jobs ({len(recent_jobs)})"):
+            job_ids = list(recent_jobs)
+            current = st.session_state.get("batch_job")
+            chosen = st.selectbox(
+                "Show results of", job_ids, index=job_ids.index(current) if current in job_ids else 0,
+                format_func=lambda i: f"{recent_jobs[i].name} · {recent_jobs[i].status} · {recent_jobs[i].rows_done:,} rows · {i}"
+            )
+            if chosen != current:
+                st.session_state.batch_job = chosen
+                st.rerun()
+
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def show_job_progress(job_id):
+        job = job_manager.status(job_id)
+        if job is None or job.finished:
+            st.rerun()
+        st.progress(job.progress, text=f"⏳ Analyzing {job.name}: {job.rows_done:,} articles so far ({job.status})")
+        st.caption("The job runs in the background: you can switch tabs or reload the page and come back.")
+
+    job_id = st.session_state.get("batch_job")
+    job = job_manager.status(job_id) if job_id else None
+    if job is not None and not job.finished:
+        show_job_progress(job_id)
+    elif job is not None and job.status == "failed":
+        st.error(f"❌ Batch job failed: {job.error}")
+    elif job is not None:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Articles", job.rows_done)
+        with col2:
+            st.metric("Fake News", job.counts["FAKE"], delta=None, delta_color="inverse")
+        with col3:
+            st.metric("Real News", job.counts["REAL"], delta=None)
+        if job.counts["ERROR"] > 0:
+            st.warning(f"{job.counts['ERROR']} articles could not be analyzed.")
+        st.markdown("### 📋 Results")
+        if job.scored < job.rows_done:
+            st.caption(f"♻️ {job.rows_done - job.scored} duplicate rows ({job.dedup_ratio:.1%}) reused an earlier result; {job.scored} unique texts were scored.")
+        store = job.store()
+        f1, f2, f3, f4 = st.columns([2, 2, 1, 1])
+        with f1:
+            browse_labels = st.multiselect("Prediction", RESULT_LABELS, default=RESULT_LABELS, key="browse_labels")
+        with f2:
+            browse_confidence = st.slider("Confidence", 0.5, 1.0, (0.5, 1.0), 0.01, key="browse_confidence",
+                                          help="Probability of the predicted label. Rows that could not be analyzed have none and are always shown.")
+        with f3:
+            sort_options = [c for c in SORT_COLUMNS if c != "cluster" or store.clusters]
+            browse_sort = st.selectbox("Sort by", sort_options, key="browse_sort")
+            browse_desc = st.checkbox("Descending", key="browse_desc")
+        with f4:
+            page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1, key="browse_page_size")
+            pages = max(1, math.ceil(store.count(browse_labels, browse_confidence) / page_size))
+            if st.session_state.get("browse_page", 1) > pages:
+                st.session_state.browse_page = pages
+            page = st.number_input("Page", 1, pages, key="browse_page")
+        page_frame, matching = store.page(browse_labels, browse_confidence, browse_sort, browse_desc, page, page_size)
+        st.dataframe(
+            page_frame, use_container_width=True, hide_index=True,
+            column_config={
+                "id": st.column_config.NumberColumn("Row", format="%d"),
+                "probability": st.column_config.NumberColumn("P(REAL)", format="percent"),
+                "confidence": st.column_config.NumberColumn("Confidence", format="percent"),
+            }
+        )
+        st.caption(f"{matching:,} of {job.rows_done:,} rows match · page {page} of {pages}")
+        if job.options["clusters"]:
+            cluster_frame = job.cluster_frame()
+            st.markdown("### 🧬 Near-duplicate Groups")
+            st.caption(f"{job.clusters} groups, {len(cluster_frame)} with more than one article.")
+            if not cluster_frame.empty:
+                st.dataframe(
+                    cluster_frame.head(PREVIEW_CLUSTERS), use_container_width=True, hide_index=True,
+                    column_config={
+                        "mean_probability": st.column_config.NumberColumn("Mean P(REAL)", format="percent"),
+                        "agreement": st.column_config.NumberColumn("Agreement", format="percent"),
+                    }
+                )
+        download_cols = st.columns(len(job.paths))
+        for col, (fmt, path) in zip(download_cols, job.paths.items()):
+            label, mime = RESULT_DOWNLOADS[fmt]
+            with col:
+                # Deferred: the file is read when the button is clicked, not on every rerun
                 st.download_button(
-                    "📥 Download Results",
-                    csv_data,
-                    "fake_news_results.csv",
-                    "text/csv",
+                    f"📥 {label}",
+                    partial(read_result_file, path),
+                    f"fake_news_results.{fmt}",
+                    mime,
                     use_container_width=True
                 )
     st.markdown("</div>", unsafe_allow_html=True)
@@ -1088,8 +1128,9 @@ with tab3:
                 st.session_state.auto_running = False
                 st.rerun()
     if st.session_state.auto_running:
-        headline = ALL_HEADLINES[st.session_state.auto_index % len(ALL_HEADLINES)]
-        pred, prob = cached_analyze(headline)  # use cached version
+        headline = AUTO_BOOTH_HEADLINES[st.session_state.auto_index % len(AUTO_BOOTH_HEADLINES)]
+        analysis = headline_table.analysis(headline) or detector.analyze_full(headline)[0]
+        pred, prob = analysis.label, analysis.prob
         result_class = "fake" if pred == "FAKE" else "real"
         st.markdown(f"""
         <div class='prediction-box {result_class}'>
@@ -1106,8 +1147,8 @@ with tab3:
         </div>
         """, unsafe_allow_html=True)
         if pred == "FAKE":
-            st.markdown(highlight_suspicious(headline), unsafe_allow_html=True)
-        reasons = explain_reasoning(headline)
+            st.markdown(highlight_suspicious(analysis), unsafe_allow_html=True)
+        reasons = explain_reasoning(analysis)
         if reasons:
             st.markdown("**🧠 Analysis:**")
             for r in reasons:
@@ -1165,11 +1206,10 @@ with tab4:
                 st.session_state.player_name = player_name
                 st.session_state.total_games_played += 1
                 # Update achievements: games played
-                for ach in ACHIEVEMENTS:
-                    if ach["id"].startswith("games_"):
-                        update_achievement(player_name, ach["id"], increment=1, skip_collective=False)
+                events = [("game_start", mode)]
                 if st.session_state.total_games_played == 1:
-                    update_achievement(player_name, "newbie", force_progress=1, skip_collective=False)
+                    events.append(("first_game", 1))
+                record_events(player_name, events)
                 # Other game-start achievements (e.g., hard mode, etc.) can be added later
                 if mode == "Mind-Game (Timed)":
                     st.session_state.mind_index = 0
@@ -1214,9 +1254,8 @@ with tab4:
         # Show leaderboard
         st.markdown("<div class='main-card'>", unsafe_allow_html=True)
         st.markdown("### 🏆 Current Leaderboard")
-        board = load_leaderboard()
-        if board:
-            sorted_board = sorted(board.items(), key=lambda x: x[1]["score"], reverse=True)[:10]
+        sorted_board = leaderboard.top(10)
+        if sorted_board:
             for i, (name, data) in enumerate(sorted_board, 1):
                 rank_class = "gold" if i == 1 else "silver" if i == 2 else "bronze" if i == 3 else ""
                 medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}"
@@ -1274,10 +1313,7 @@ with tab4:
                 else:
                     st.balloons()
                     st.markdown(f"## Final Score: {st.session_state.mind_score}")
-                    board = load_leaderboard()
-                    if player_name not in board or board[player_name]["score"] < st.session_state.mind_score:
-                        board[player_name] = {"score": st.session_state.mind_score, "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
-                        save_leaderboard(board)
+                    if save_high_score(player_name, st.session_state.mind_score):
                         st.success("New high score saved!")
                     if st.button("Play Again", use_container_width=True):
                         reset_game_mode(mode)
@@ -1314,16 +1350,15 @@ with tab4:
                         if action == pred:
                             st.session_state.speed_score += 1
                             st.session_state.speed_streak += 1
-                            on_correct_answer(player_name)
+                            events = [("correct", 1)]
                             if st.session_state.speed_streak % 5 == 0:
                                 st.session_state.speed_score += 2
                                 st.success(f"🔥 Streak bonus! +2 points")
                                 # Update streak achievements
-                                for ach in ACHIEVEMENTS:
-                                    if ach["id"].startswith("streak_") and st.session_state.speed_streak >= ach["max_progress"]:
-                                        update_achievement(player_name, ach["id"], force_progress=ach["max_progress"], skip_collective=False)
+                                events.append(("streak", st.session_state.speed_streak))
                             else:
                                 st.success("Correct!")
+                            record_events(player_name, events)
                         else:
                             st.session_state.speed_streak = 0
                             st.error(f"Wrong! It was {pred}")
@@ -1335,10 +1370,7 @@ with tab4:
                         st.warning("⏰ Time's up!")
                     st.balloons()
                     st.markdown(f"## Final Score: {st.session_state.speed_score}")
-                    board = load_leaderboard()
-                    if player_name not in board or board[player_name]["score"] < st.session_state.speed_score:
-                        board[player_name] = {"score": st.session_state.speed_score, "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
-                        save_leaderboard(board)
+                    if save_high_score(player_name, st.session_state.speed_score):
                         st.success("New high score saved!")
                     if st.button("Play Again", use_container_width=True):
                         reset_game_mode(mode)
@@ -1384,10 +1416,7 @@ with tab4:
                         st.info("You've completed all headlines!")
                     st.balloons()
                     st.markdown(f"## Final Score: {st.session_state.survival_score}")
-                    board = load_leaderboard()
-                    if player_name not in board or board[player_name]["score"] < st.session_state.survival_score:
-                        board[player_name] = {"score": st.session_state.survival_score, "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
-                        save_leaderboard(board)
+                    if save_high_score(player_name, st.session_state.survival_score):
                         st.success("New high score saved!")
                     if st.button("Play Again", use_container_width=True):
                         reset_game_mode(mode)
@@ -1427,10 +1456,7 @@ with tab4:
                 else:
                     st.balloons()
                     st.markdown(f"## Final Score: {st.session_state.expert_score} / {len(EXPERT_HEADLINES)}")
-                    board = load_leaderboard()
-                    if player_name not in board or board[player_name]["score"] < st.session_state.expert_score:
-                        board[player_name] = {"score": st.session_state.expert_score, "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
-                        save_leaderboard(board)
+                    if save_high_score(player_name, st.session_state.expert_score):
                         st.success("New high score saved!")
                     if st.button("Play Again", use_container_width=True):
                         reset_game_mode(mode)
@@ -1480,10 +1506,7 @@ with tab4:
                 else:
                     st.balloons()
                     st.markdown(f"## Final Score: {st.session_state.swap_score}")
-                    board = load_leaderboard()
-                    if player_name not in board or board[player_name]["score"] < st.session_state.swap_score:
-                        board[player_name] = {"score": st.session_state.swap_score, "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
-                        save_leaderboard(board)
+                    if save_high_score(player_name, st.session_state.swap_score):
                         st.success("New high score saved!")
                     if st.button("Play Again", use_container_width=True):
                         reset_game_mode(mode)
@@ -1542,10 +1565,7 @@ with tab4:
                 else:
                     st.balloons()
                     st.markdown(f"## Final Score: {st.session_state.zoom_score}")
-                    board = load_leaderboard()
-                    if player_name not in board or board[player_name]["score"] < st.session_state.zoom_score:
-                        board[player_name] = {"score": st.session_state.zoom_score, "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
-                        save_leaderboard(board)
+                    if save_high_score(player_name, st.session_state.zoom_score):
                         st.success("New high score saved!")
                     if st.button("Play Again", use_container_width=True):
                         reset_game_mode(mode)
@@ -1602,10 +1622,7 @@ with tab4:
                         st.markdown(f"## 🤖 AI wins! Final: You {st.session_state.battle_player_score} – AI {st.session_state.battle_ai_score}")
                     else:
                         st.markdown(f"## 🤝 It's a tie! Final: You {st.session_state.battle_player_score} – AI {st.session_state.battle_ai_score}")
-                    board = load_leaderboard()
-                    if player_name not in board or board[player_name]["score"] < st.session_state.battle_player_score:
-                        board[player_name] = {"score": st.session_state.battle_player_score, "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
-                        save_leaderboard(board)
+                    if save_high_score(player_name, st.session_state.battle_player_score):
                         st.success("New high score saved!")
                     if st.button("Play Again", use_container_width=True):
                         reset_game_mode(mode)
@@ -1639,12 +1656,13 @@ with tab4:
                         else:
                             st.error(f"❌ Wrong! It was {pred}.")
                         st.markdown("### 📖 Explanation")
-                        reasons = explain_reasoning(headline)
+                        analysis = headline_table.analysis(headline) or detector.analyze_full(headline)[0]
+                        reasons = explain_reasoning(analysis)
                         for r in reasons:
                             st.markdown(f"- {r}")
                         if pred == "FAKE":
                             st.markdown("**Suspicious words:**")
-                            st.markdown(highlight_suspicious(headline), unsafe_allow_html=True)
+                            st.markdown(highlight_suspicious(analysis), unsafe_allow_html=True)
                         st.session_state.training_index += 1
                         time.sleep(0.5)
                         st.rerun()
@@ -1664,12 +1682,7 @@ with tab5:
     st.markdown("<div class='main-card'>", unsafe_allow_html=True)
     st.markdown("### 🏆 Your Achievements")
     player_name = st.session_state.get("player_name", "Player")
-    if os.path.exists(ACHIEVEMENTS_FILE):
-        with open(ACHIEVEMENTS_FILE, "r") as f:
-            all_players_data = json.load(f)
-        all_players = list(all_players_data.keys())
-    else:
-        all_players = []
+    all_players = achievement_store.players()
     selected_player = st.selectbox("Select player:", [player_name] + [p for p in all_players if p != player_name])
     if selected_player != player_name:
         player_name = selected_player
@@ -1736,14 +1749,14 @@ with tab6:
             st.session_state.player_name = player_name  # use unified player_name
             st.session_state.total_games_played += 1
             if st.session_state.total_games_played == 1:
-                update_achievement(player_name, "newbie", force_progress=1, skip_collective=False)
+                record_events(player_name, [("first_game", 1)])
             st.rerun()
     else:
         player_name = st.session_state.player_name
         if st.session_state.accuracy_index < len(EASY_HEADLINES):
             idx = st.session_state.accuracy_index
             headline = EASY_HEADLINES[idx]
-            pred, prob = analyze_text(headline)
+            pred, prob = cached_analyze(headline)
             if pred is None:
                 st.stop()
             st.progress((idx) / len(EASY_HEADLINES), text=f"Headline {idx+1} of {len(EASY_HEADLINES)}")
@@ -1776,7 +1789,7 @@ with tab6:
             st.markdown(f"## 🎉 You scored **{accuracy_pct:.1f}%**")
             if accuracy_pct == 100:
                 st.markdown("### Perfect! 🏆")
-                update_achievement(player_name, "perfectionist", force_progress=1, skip_collective=False)
+                record_events(player_name, [("perfect_score", 1)])
                 st.session_state.perfect_scores += 1
             if st.button("Play Again", use_container_width=True):
                 st.session_state.accuracy_started = False
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Pickle-free model artifact for the TF-IDF + Logistic Regression detector.
+
+An artifact is a directory of raw NumPy arrays plus a small JSON header:
+
+  model_artifact/
+    meta.json          format version, vectorizer settings, array shapes
+    idf.npy            float64[n_features]
+    coef.npy           float64[n_features]
+    intercept.npy      float64[1]
+    classes.npy        int64[2]
+    vocab.bin          UTF-8 terms, concatenated in feature-index order
+    vocab_offsets.npy  int64[n_features + 1], byte offsets into vocab.bin
+
+Hashing-mode vectorizers (features.HashingTfidfVectorizer) have no
+vocabulary: their header has "kind": "hashing" and the vocab files are omitted.
+
+The numeric arrays are opened with np.load(mmap_mode="r"), so several
+server processes share one copy of the pages and loading takes milliseconds.
+
+Usage:
+  python artifact.py                                  # export from vectorizer.pkl / fake_news_model.pkl
+  python artifact.py --vectorizer v.pkl --model m.pkl --out model_artifact
+"""
+
+import os
+import json
+import pickle
+import argparse
+import numpy as np
+from features import HashingTfidfVectorizer, is_hashing
+
+ARTIFACT_DIR = "model_artifact"
+ARTIFACT_FORMAT = "fake-news-linear"
+ARTIFACT_VERSION = 1
+
+# TfidfVectorizer settings that affect transform() and are stored in the header
+VECTORIZER_PARAMS = [
+    "lowercase", "strip_accents", "token_pattern", "ngram_range", "stop_words",
+    "norm", "use_idf", "smooth_idf", "sublinear_tf", "binary"
+]
+HASHING_PARAMS = ["n_features", "ngram_range", "stop_words", "lowercase", "norm", "smooth_idf", "sublinear_tf"]
+
+
+def export_artifact(vectorizer, model, out_dir=ARTIFACT_DIR):
+    """Write vectorizer + model to out_dir in the artifact layout."""
+    hashing = is_hashing(vectorizer)
+    if not hashing and (getattr(vectorizer, "analyzer", "word") != "word" or vectorizer.tokenizer or vectorizer.preprocessor):
+        raise ValueError("Only word analyzers with the default tokenizer can be exported.")
+    os.makedirs(out_dir, exist_ok=True)
+
+    arrays = {}
+    if not hashing:
+        terms = [None] * len(vectorizer.vocabulary_)
+        for term, i in vectorizer.vocabulary_.items():
+            terms[i] = term
+        encoded = [t.encode("utf-8") for t in terms]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        with open(os.path.join(out_dir, "vocab.bin"), "wb") as f:
+            f.write(b"".join(encoded))
+        arrays["vocab_offsets"] = offsets
+
+    arrays.update({
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64),
+        "coef": np.asarray(model.coef_[0], dtype=np.float64),
+        "intercept": np.asarray(model.intercept_, dtype=np.float64),
+        "classes": np.asarray(model.classes_, dtype=np.int64),
+    })
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr)
+
+    params = vectorizer.get_params()
+    stop_words = params["stop_words"]
+    if stop_words is not None and not isinstance(stop_words, str):
+        stop_words = sorted(stop_words)
+    meta = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "kind": "hashing" if hashing else "vocabulary",
+        "n_features": len(arrays["idf"]),
+        "vectorizer": {k: params[k] for k in (HASHING_PARAMS if hashing else VECTORIZER_PARAMS)},
+        "arrays": {name: {"dtype": str(arr.dtype), "shape": list(arr.shape)} for name, arr in arrays.items()},
+    }
+    meta["vectorizer"]["stop_words"] = stop_words
+    meta["vectorizer"]["ngram_range"] = list(params["ngram_range"])
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return out_dir
+
+
+def read_meta(path=ARTIFACT_DIR):
+    """Read and check the artifact header."""
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        meta = json.load(f)
+    if meta.get("format") != ARTIFACT_FORMAT or meta.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported model artifact in {path}: {meta.get('format')} v{meta.get('version')}")
+    return meta
+
+
+def load_arrays(path=ARTIFACT_DIR, mmap_mode="r"):
+    """Memory-map every array of the artifact. Returns (meta, {name: array})."""
+    meta = read_meta(path)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in meta["arrays"]}
+    return meta, arrays
+
+
+def load_vocabulary(path, offsets):
+    """Rebuild the term -> feature index dict from vocab.bin."""
+    with open(os.path.join(path, "vocab.bin"), "rb") as f:
+        blob = f.read()
+    return {blob[offsets[i]:offsets[i + 1]].decode("utf-8"): i for i in range(len(offsets) - 1)}
+
+
+def load_artifact(path=ARTIFACT_DIR):
+    """
+    Load an artifact without pickle. Returns (vectorizer, model): sklearn
+    objects whose idf and coefficient arrays are read-only memory maps.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    meta, arrays = load_arrays(path)
+    params = dict(meta["vectorizer"])
+    params["ngram_range"] = tuple(params["ngram_range"])
+    if isinstance(params["stop_words"], list):
+        params["stop_words"] = frozenset(params["stop_words"])
+
+    if meta.get("kind", "vocabulary") == "hashing":
+        vectorizer = HashingTfidfVectorizer.from_idf(arrays["idf"], **params)
+    else:
+        vectorizer = TfidfVectorizer(vocabulary=load_vocabulary(path, arrays["vocab_offsets"]), **params)
+        vectorizer.idf_ = arrays["idf"]
+
+    model = LogisticRegression()
+    model.coef_ = arrays["coef"].reshape(1, -1)
+    model.intercept_ = arrays["intercept"]
+    model.classes_ = np.asarray(arrays["classes"])
+    return vectorizer, model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export pickled model files to a memory-mappable artifact.")
+    parser.add_argument("--vectorizer", default="vectorizer.pkl", help="Pickled TfidfVectorizer")
+    parser.add_argument("--model", default="fake_news_model.pkl", help="Pickled LogisticRegression")
+    parser.add_argument("--out", "-o", default=ARTIFACT_DIR, help="Output directory")
+    args = parser.parse_args()
+    with open(args.vectorizer, "rb") as f:
+        vectorizer = pickle.load(f)
+    with open(args.model, "rb") as f:
+        model = pickle.load(f)
+    export_artifact(vectorizer, model, args.out)
+    print(f"Saved: {args.out}/")
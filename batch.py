@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Streaming batch scoring for CSV uploads and offline files.
+
+The input is read in bounded chunks, each chunk is scored with one
+vectorized call and its rows are appended to the output files right away,
+so peak memory depends on the chunk size, not on the size of the upload.
+
+Results are typed columns: the original row id, the text preview, the label
+as a categorical (FAKE/REAL/ERROR) and P(REAL) as float32. Besides CSV they
+can be written as Parquet and Arrow IPC (Feather v2) files when pyarrow is
+installed, which keeps the types for pandas/Arrow readers downstream.
+
+Repeated texts are scored once per job: rows are keyed by a fingerprint of
+the text the model sees, only unseen keys are sent for scoring and their
+results are scattered back to every duplicate (see Deduplicator). An
+optional near-duplicate stage (near_duplicates.NearDuplicateIndex) adds a
+cluster id to every row, collects per-cluster verdict statistics and can
+score one representative per cluster instead of every member.
+
+With workers > 1 the chunks are fanned out to a process pool. Workers load
+the model from the memory-mapped artifact (see artifact.py), so every
+process shares one copy of the coefficient pages and only the texts and the
+result rows cross the process boundary. Results come back in input order.
+
+Usage:
+  from detector import load_detector
+  from batch import score_csv
+  summary = score_csv(load_detector(), "articles.csv", "results.csv")
+  summary = score_csv(load_detector(), "articles.csv", "results.csv", workers=4)
+
+Command line (headless, same analysis as the app):
+  python batch.py articles.csv -o results.jsonl            # CSV in, JSON lines out
+  python batch.py articles.jsonl -o results.parquet --reasons 3
+  cat headlines.txt | python batch.py - --format txt       # one text per line, CSV to stdout
+"""
+
+import os
+import sys
+import json
+import atexit
+import argparse
+import shutil
+import tempfile
+import importlib.util
+import multiprocessing
+from itertools import islice
+from functools import partial
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from artifact import export_artifact
+from near_duplicates import SIMILARITY_THRESHOLD, UNCLUSTERED, NearDuplicateIndex
+from detector import CLASS_LABELS, ERROR_LABEL, DEFAULT_CHUNK_SIZE, AGGREGATION_STRATEGIES, TOP_N_FEATURES, \
+    MAX_TEXT_LENGTH, PredictionCache, clean_text, fingerprint, load_detector, preview
+
+READ_CHUNK_ROWS = 20000
+TEXT_COLUMN = "text"
+PARALLEL_CHUNK_ROWS = 5000
+MAX_PENDING_PER_WORKER = 2
+DEDUP_CACHE_SIZE = 200000
+INPUT_FORMATS = ("csv", "jsonl", "txt")
+OUTPUT_FORMATS = ("csv", "jsonl", "parquet", "arrow")
+FORMAT_ALIASES = {"ndjson": "jsonl", "json": "jsonl", "text": "txt", "pq": "parquet", "feather": "arrow", "ipc": "arrow"}
+RECORD_COLUMNS = ["id", "text", "prediction", "probability"]
+LABELS = list(CLASS_LABELS.values()) + [ERROR_LABEL]
+# Result files of a batch (score_csv, background jobs); the columnar ones need pyarrow
+EXPORT_FORMATS = ("csv", "parquet", "arrow") if importlib.util.find_spec("pyarrow") else ("csv",)
+REASON_SEPARATOR = " | "
+
+_worker_detector = None
+
+
+class BatchSummary:
+    """Counts of a finished batch run; the results are on disk in paths[fmt]."""
+
+    def __init__(self, paths):
+        self.paths = dict(paths)
+        self.total = 0
+        self.counts = {label: 0 for label in LABELS}
+        self.scored = 0
+        self.clusters = None
+
+    @property
+    def dedup_ratio(self):
+        """Share of rows answered from an earlier identical text instead of being scored."""
+        return 1 - self.scored / self.total if self.total else 0.0
+
+    def add(self, rows):
+        self.total += len(rows)
+        for row in rows:
+            self.counts[row["prediction"]] += 1
+
+    def cluster_frame(self, min_size=2):
+        """Per-cluster verdict statistics, when the run grouped near-duplicates."""
+        return pd.DataFrame(self.clusters.summary(min_size)) if self.clusters is not None else pd.DataFrame()
+
+
+def read_columns(source):
+    """Column names of a CSV without reading its body; rewinds file objects."""
+    columns = list(pd.read_csv(source, nrows=0).columns)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return columns
+
+
+# -----------------------------
+# Process pool
+# -----------------------------
+def shared_artifact(detector):
+    """
+    Directory workers can memory-map the detector's model from. Detectors
+    loaded from pickles are exported once to a temporary artifact that is
+    removed when the process exits.
+    """
+    if detector.artifact_dir is None:
+        path = tempfile.mkdtemp(prefix="fake_news_artifact_")
+        atexit.register(shutil.rmtree, path, True)
+        export_artifact(detector.vectorizer, detector.model, path)
+        detector.artifact_dir = path
+    return detector.artifact_dir
+
+
+def _init_worker(artifact_dir):
+    global _worker_detector
+    # Workers only run batch scoring, which reads the prediction cache but never fills it
+    _worker_detector = load_detector(artifact_dir=artifact_dir, cache_size=0)
+
+
+def _score_chunk(score, texts):
+    return score(_worker_detector, texts)
+
+
+def record_rows(detector, texts, reasons=0, chunk_size=DEFAULT_CHUNK_SIZE, long_strategy=None):
+    """
+    {"prediction", "probability"} per text, plus a "reasons" list when
+    reasons > 0. probability is P(REAL), None for invalid rows.
+    """
+    if not reasons:
+        return [{"prediction": label, "probability": prob}
+                for label, prob in detector.score_batch(texts, chunk_size, long_strategy=long_strategy)]
+    rows = []
+    for result, _ in detector.analyze_many(texts, reasons, chunk_size, long_strategy):
+        if result is None:
+            rows.append({"prediction": ERROR_LABEL, "probability": None, "reasons": []})
+        else:
+            rows.append({"prediction": result.label, "probability": result.prob, "reasons": result.reasons(reasons)})
+    return rows
+
+
+def open_pool(detector, workers):
+    """Process pool whose workers each memory-map the detector's model once at startup."""
+    # spawn, not fork: the Streamlit server is multi-threaded
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(shared_artifact(detector),))
+
+
+def iter_scored_chunks(detector, chunks, workers=1, score=record_rows, pool=None):
+    """
+    Yield score(detector, texts) for each list of texts in chunks, in order.
+    score must be a module-level function (or a functools.partial of one)
+    so it can be sent to worker processes; the default gives prediction and
+    probability rows. With workers > 1 the lists are scored in worker processes: in
+    pool if given (from open_pool(detector, workers)), else in a pool of its
+    own. At most MAX_PENDING_PER_WORKER chunks per worker are in flight, so
+    a slow consumer or a huge input never queues more than a few chunks.
+    """
+    if pool is None and workers <= 1:
+        for texts in chunks:
+            yield score(detector, texts)
+        return
+    if pool is None:
+        with open_pool(detector, workers) as pool:
+            yield from iter_scored_chunks(detector, chunks, workers, score, pool)
+        return
+    max_pending = max(1, workers) * MAX_PENDING_PER_WORKER
+    pending = deque()
+    for texts in chunks:
+        pending.append(pool.submit(_score_chunk, score, texts))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class Deduplicator:
+    """
+    Job-wide duplicate detection for batch scoring. key() fingerprints the
+    text the model actually sees (trimmed, truncated unless long articles
+    are windowed, case folded when the vectorizer lowercases), so equal keys
+    are guaranteed equal predictions. With reasons the key keeps case, since
+    the all-caps heuristic depends on it. Scored rows are remembered in a
+    bounded LRU; total and scored count rows seen and rows actually scored.
+    """
+
+    def __init__(self, detector, reasons=0, long_strategy=None, maxsize=DEDUP_CACHE_SIZE):
+        self.lowercase = bool(getattr(detector.vectorizer, "lowercase", False)) and not reasons
+        self.case_sensitive = bool(reasons)
+        self.max_length = None if long_strategy else MAX_TEXT_LENGTH
+        self.rows = PredictionCache(maxsize)
+        self.total = 0
+        self.scored = 0
+
+    def key(self, text):
+        if self.case_sensitive:
+            return fingerprint(str(text).strip(), False)
+        cleaned, error = clean_text(text, max_length=self.max_length)
+        return fingerprint(cleaned if error is None else "", self.lowercase)
+
+    @property
+    def ratio(self):
+        return 1 - self.scored / self.total if self.total else 0.0
+
+
+def assign_clusters(clusters, texts, max_length=MAX_TEXT_LENGTH):
+    """Cluster ids for texts; rows that fail validation stay UNCLUSTERED."""
+    cluster_ids = [UNCLUSTERED] * len(texts)
+    valid = []
+    for i, text in enumerate(texts):
+        cleaned, error = clean_text(text, max_length=max_length)
+        if error is None:
+            valid.append((i, cleaned))
+    for (i, _), cluster in zip(valid, clusters.assign([t for _, t in valid])):
+        cluster_ids[i] = cluster
+    return cluster_ids
+
+
+def iter_scored_records(detector, chunks, reasons=0, chunk_size=DEFAULT_CHUNK_SIZE, long_strategy=None, workers=1,
+                        dedup=None, clusters=None):
+    """
+    Yield id/text/prediction/probability (and reasons) rows for every
+    (ids, texts) chunk of iter_records, in order; see record_rows. Each
+    distinct text is scored once: per chunk only keys that dedup (a
+    Deduplicator, one per call by default) has no result for are sent for
+    scoring. With workers, chunks are dispatched ahead of their results, so a
+    text repeated in a chunk that is still in flight is scored once more.
+    With clusters (a NearDuplicateIndex) rows also get a "cluster" id, and
+    if clusters.representatives is set the members of a cluster share the
+    result of its representative, the first member seen.
+    """
+    if dedup is None:
+        dedup = Deduplicator(detector, reasons, long_strategy)
+    pending = deque()
+
+    def texts():
+        for ids, batch in chunks:
+            keys = [dedup.key(t) for t in batch]
+            cluster_ids = None
+            if clusters is not None:
+                cluster_ids = assign_clusters(clusters, batch, dedup.max_length)
+                if clusters.representatives:
+                    keys = [k if c == UNCLUSTERED else ("cluster", c) for k, c in zip(keys, cluster_ids)]
+            known, todo_keys, todo = {}, [], []
+            for key, text in zip(keys, batch):
+                if key in known:
+                    continue
+                row = dedup.rows.get(key)
+                known[key] = row
+                if row is None:
+                    todo_keys.append(key)
+                    todo.append(text)
+            dedup.total += len(batch)
+            dedup.scored += len(todo)
+            pending.append((ids, batch, keys, known, todo_keys, cluster_ids))
+            yield todo
+
+    score = partial(record_rows, reasons=reasons, chunk_size=chunk_size, long_strategy=long_strategy)
+    for rows in iter_scored_chunks(detector, texts(), workers, score):
+        ids, batch, keys, known, todo_keys, cluster_ids = pending.popleft()
+        for key, row in zip(todo_keys, rows):
+            known[key] = row
+            dedup.rows.put(key, row)
+        out = []
+        for i, (row_id, text, key) in enumerate(zip(ids, batch, keys)):
+            row = dict(known[key])
+            row["id"] = row_id
+            row["text"] = preview(text)
+            if cluster_ids is not None:
+                row["cluster"] = cluster_ids[i]
+                clusters.observe(cluster_ids[i], row["prediction"], row["probability"])
+            out.append(row)
+        yield out
+
+
+def _split(chunks, size):
+    for ids, texts in chunks:
+        for start in range(0, len(texts), size):
+            yield ids[start:start + size], texts[start:start + size]
+
+
+def score_csv(detector, source, out_path, chunksize=READ_CHUNK_ROWS, text_column=TEXT_COLUMN,
+              long_strategy=None, workers=1, formats=EXPORT_FORMATS, clusters=None):
+    """
+    Stream a CSV through the detector and write id/text/prediction/probability
+    rows chunk by chunk to out_path (CSV) and, for every other entry of
+    formats, to a file of that type next to it.
+    clusters, a NearDuplicateIndex, enables the near-duplicate stage and is
+    kept on the summary for its per-cluster statistics.
+    workers > 1 scores the chunks in a process pool (see iter_scored_chunks).
+    Returns a BatchSummary.
+    """
+    if text_column not in read_columns(source):
+        raise ValueError(f"CSV must have a '{text_column}' column!")
+    base = os.path.splitext(out_path)[0]
+    summary = BatchSummary({fmt: out_path if fmt == "csv" else f"{base}.{fmt}" for fmt in formats})
+    chunks = iter_records(source, "csv", chunksize, text_column)
+    if workers > 1:
+        # Smaller tasks keep every worker busy on uploads of only a few read chunks
+        chunks = _split(chunks, PARALLEL_CHUNK_ROWS)
+    summary.clusters = clusters
+    columns = record_columns(clusters=clusters is not None)
+    writers = [RecordWriter(path, fmt, columns) for fmt, path in summary.paths.items()]
+    dedup = Deduplicator(detector, long_strategy=long_strategy)
+    try:
+        for rows in iter_scored_records(detector, chunks, chunk_size=min(chunksize, DEFAULT_CHUNK_SIZE),
+                                        long_strategy=long_strategy, workers=workers, dedup=dedup,
+                                        clusters=clusters):
+            for writer in writers:
+                writer.write(rows)
+            summary.add(rows)
+            summary.scored = dedup.scored
+    finally:
+        for writer in writers:
+            writer.close()
+    return summary
+
+
+# -----------------------------
+# Offline files
+# -----------------------------
+def detect_format(path, formats, default=None):
+    """Format name from a file extension, or default when it is not one of formats."""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    ext = FORMAT_ALIASES.get(ext, ext)
+    return ext if ext in formats else default
+
+
+def iter_records(source, fmt, chunksize=READ_CHUNK_ROWS, text_column=TEXT_COLUMN, id_column=None):
+    """
+    Yield (ids, texts) lists of at most chunksize rows from a csv, jsonl or
+    txt source (a path or an open text file). ids come from id_column when
+    given, otherwise they are 0-based row numbers. JSON lines may be objects
+    holding text_column or bare strings; txt has one text per line.
+    """
+    if fmt == "csv":
+        columns = [text_column] + ([id_column] if id_column else [])
+        # Only files can be rewound after peeking at the header; pandas reports a missing column on streams
+        if isinstance(source, (str, os.PathLike)) and text_column not in read_columns(source):
+            raise ValueError(f"CSV must have a '{text_column}' column!")
+        reader = pd.read_csv(source, usecols=columns, dtype={text_column: str}, keep_default_na=False,
+                             chunksize=chunksize)
+        row = 0
+        for chunk in reader:
+            ids = chunk[id_column].tolist() if id_column else list(range(row, row + len(chunk)))
+            row += len(chunk)
+            yield ids, chunk[text_column].tolist()
+        return
+    if fmt not in INPUT_FORMATS:
+        raise ValueError(f"Unknown input format '{fmt}'. Choose from: {', '.join(INPUT_FORMATS)}")
+    f = open(source, "r", encoding="utf-8") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        row = 0
+        while True:
+            lines = list(islice(f, chunksize))
+            if not lines:
+                break
+            ids, texts = list(range(row, row + len(lines))), []
+            for i, line in enumerate(lines):
+                line = line.rstrip("\r\n")
+                if fmt == "txt":
+                    texts.append(line)
+                    continue
+                record = json.loads(line) if line.strip() else ""
+                if isinstance(record, dict):
+                    if id_column:
+                        ids[i] = record.get(id_column, ids[i])
+                    record = record.get(text_column, "")
+                texts.append("" if record is None else str(record))
+            row += len(lines)
+            yield ids, texts
+    finally:
+        if f is not source:
+            f.close()
+
+
+def record_columns(reasons=False, clusters=False):
+    """Output columns for a run with or without reasons and cluster ids."""
+    return RECORD_COLUMNS + (["cluster"] if clusters else []) + (["reasons"] if reasons else [])
+
+
+def typed_frame(rows, columns=RECORD_COLUMNS):
+    """Result rows as a DataFrame with a categorical label and float32 probability."""
+    frame = pd.DataFrame(rows, columns=columns)
+    frame["prediction"] = pd.Categorical(frame["prediction"], categories=LABELS)
+    frame["probability"] = frame["probability"].astype("float32")
+    if "cluster" in frame:
+        frame["cluster"] = frame["cluster"].astype("int32")
+    return frame
+
+
+def arrow_schema(columns, id_type=None):
+    """Arrow schema of the result columns; id_type defaults to int64 row numbers."""
+    import pyarrow as pa
+    types = {
+        "id": id_type or pa.int64(),
+        "text": pa.string(),
+        "prediction": pa.dictionary(pa.int8(), pa.string()),
+        "probability": pa.float32(),
+        "cluster": pa.int32(),
+        "reasons": pa.list_(pa.string()),
+    }
+    return pa.schema([(c, types[c]) for c in columns])
+
+
+class RecordWriter:
+    """
+    Append result rows to a csv, jsonl, parquet or arrow file (csv and jsonl
+    can also go to an open text stream). The columnar formats are typed as
+    in arrow_schema; jsonl keeps plain JSON numbers and strings.
+    """
+
+    def __init__(self, target, fmt, columns=RECORD_COLUMNS):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}'. Choose from: {', '.join(OUTPUT_FORMATS)}")
+        self.fmt = fmt
+        self.columns = list(columns)
+        self._columnar = None
+        self._schema = None
+        if fmt in ("parquet", "arrow"):
+            if not isinstance(target, (str, os.PathLike)):
+                raise ValueError(f"{fmt.capitalize()} output needs a file path.")
+            self._file = None
+            self._path = target
+        elif isinstance(target, (str, os.PathLike)):
+            self._file = open(target, "w", newline="", encoding="utf-8")
+        else:
+            self._file = target
+        self._owns_file = self._file is not target
+        self._started = False
+
+    def write(self, rows):
+        header, self._started = not self._started, True
+        if self.fmt == "jsonl":
+            for row in rows:
+                self._file.write(json.dumps({c: row.get(c) for c in self.columns}, ensure_ascii=False) + "\n")
+            return
+        frame = typed_frame(rows, self.columns)
+        if self.fmt == "csv":
+            if "reasons" in frame:
+                frame["reasons"] = frame["reasons"].map(REASON_SEPARATOR.join)
+            frame.to_csv(self._file, header=header, index=False)
+            return
+        import pyarrow as pa
+        if self._columnar is None:
+            self._open_columnar(arrow_schema(self.columns, pa.array(frame["id"]).type))
+        self._columnar.write_table(pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False))
+
+    def _open_columnar(self, schema):
+        self._schema = schema
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._columnar = pq.ParquetWriter(self._path, schema)
+        else:
+            import pyarrow as pa
+            self._columnar = pa.ipc.new_file(self._path, schema)
+
+    def close(self):
+        if self.fmt == "csv" and not self._started:
+            pd.DataFrame(columns=self.columns).to_csv(self._file, index=False)
+        if self._file is None and self._columnar is None:
+            self._open_columnar(arrow_schema(self.columns))  # empty input: a file with just the schema
+        if self._columnar is not None:
+            self._columnar.close()
+        if self._owns_file and self._file is not None:
+            self._file.close()
+        elif self._file is not None:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def score_records(detector, source, target, in_format, out_format, chunksize=READ_CHUNK_ROWS,
+                  text_column=TEXT_COLUMN, id_column=None, reasons=0, long_strategy=None, workers=1, clusters=None):
+    """
+    Score every record of source and stream id/text/prediction/probability
+    (and cluster, reasons) rows to target. Returns ({label: count} totals, Deduplicator).
+    """
+    counts = {label: 0 for label in LABELS}
+    chunks = iter_records(source, in_format, chunksize, text_column, id_column)
+    dedup = Deduplicator(detector, reasons, long_strategy)
+    columns = record_columns(reasons > 0, clusters is not None)
+    with RecordWriter(target, out_format, columns) as writer:
+        for rows in iter_scored_records(detector, chunks, reasons, min(chunksize, DEFAULT_CHUNK_SIZE),
+                                        long_strategy, workers, dedup, clusters):
+            for row in rows:
+                counts[row["prediction"]] += 1
+            writer.write(rows)
+    return counts, dedup
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a file of articles without the web app.")
+    parser.add_argument("input", help="CSV, JSON lines or text file; '-' reads stdin")
+    parser.add_argument("--output", "-o", default="-", help="Output file; '-' writes to stdout (default)")
+    parser.add_argument("--format", "-f", choices=INPUT_FORMATS, help="Input format (default: from the extension, txt for stdin)")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, help="Output format (default: from the extension, csv for stdout)")
+    parser.add_argument("--text-column", default=TEXT_COLUMN, help="Column or JSON key holding the text")
+    parser.add_argument("--id-column", help="Column or JSON key to copy into the id field (default: row number)")
+    parser.add_argument("--reasons", type=int, nargs="?", const=TOP_N_FEATURES, default=0, metavar="N",
+                        help=f"Add the top N reasons per row (default N: {TOP_N_FEATURES})")
+    parser.add_argument("--long", choices=AGGREGATION_STRATEGIES, help="Score long articles in windows with this aggregation")
+    parser.add_argument("--workers", "-j", type=int, default=1, help="Worker processes")
+    parser.add_argument("--chunksize", type=int, default=PARALLEL_CHUNK_ROWS, help="Rows per scoring chunk")
+    parser.add_argument("--clusters", action="store_true", help="Group near-duplicate texts and add a cluster column")
+    parser.add_argument("--cluster-threshold", type=float, default=SIMILARITY_THRESHOLD,
+                        help="Estimated Jaccard similarity for joining a cluster")
+    parser.add_argument("--representatives", action="store_true",
+                        help="Score one representative per cluster and reuse its verdict (implies --clusters)")
+    parser.add_argument("--cluster-stats", metavar="PATH", help="Write per-cluster verdict statistics (CSV or JSON lines)")
+    args = parser.parse_args()
+
+    stdin = args.input == "-"
+    in_format = args.format or ("txt" if stdin else detect_format(args.input, INPUT_FORMATS, "csv"))
+    stdout = args.output == "-"
+    out_format = args.output_format or ("csv" if stdout else detect_format(args.output, OUTPUT_FORMATS, "csv"))
+    clusters = None
+    if args.clusters or args.representatives or args.cluster_stats:
+        clusters = NearDuplicateIndex(args.cluster_threshold, representatives=args.representatives)
+    try:
+        counts, dedup = score_records(
+            load_detector(), sys.stdin if stdin else args.input, sys.stdout if stdout else args.output,
+            in_format, out_format, chunksize=args.chunksize, text_column=args.text_column, id_column=args.id_column,
+            reasons=args.reasons, long_strategy=args.long, workers=args.workers, clusters=clusters
+        )
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    summary = ", ".join(f"{label}: {n:,}" for label, n in counts.items())
+    print(f"Scored {sum(counts.values()):,} rows ({summary}); {dedup.scored:,} texts scored, "
+          f"{dedup.ratio:.1%} reused an earlier result", file=sys.stderr)
+    if clusters is not None:
+        stats = pd.DataFrame(clusters.summary())
+        print(f"{len(clusters):,} clusters, {len(stats):,} with near-duplicates", file=sys.stderr)
+        if args.cluster_stats:
+            if detect_format(args.cluster_stats, OUTPUT_FORMATS, "csv") == "jsonl":
+                stats.to_json(args.cluster_stats, orient="records", lines=True, force_ascii=False)
+            else:
+                stats.to_csv(args.cluster_stats, index=False)
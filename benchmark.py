@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the scoring engine in detector.py.
+
+Usage:
+  python benchmark.py fastpath                 # single-headline latency: sklearn vs fast path
+  python benchmark.py fastpath --repeat 2000
+  python benchmark.py parallel                 # batch throughput for 1, 2, 4, ... worker processes
+  python benchmark.py parallel --rows 500000 --workers 1 2 4 8
+  python benchmark.py server                   # load-test a running server.py: p50/p99 latency, requests/s
+  python benchmark.py server --connections 32 --duration 20 --batch 100
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import statistics
+from urllib.parse import urlsplit
+import pandas as pd
+from batch import PARALLEL_CHUNK_ROWS, iter_scored_chunks, open_pool
+from detector import load_detector
+from train_model import DEMO_FAKE, DEMO_REAL
+
+
+def sample_texts():
+    """Headlines to benchmark with: the booth CSV plus the training demo sentences."""
+    texts = []
+    if os.path.exists("booth_samples.csv"):
+        texts.extend(pd.read_csv("booth_samples.csv")["text"].dropna().astype(str).tolist())
+    texts.extend(dict.fromkeys(DEMO_FAKE + DEMO_REAL))
+    return texts
+
+
+def time_per_call(fn, texts, repeat):
+    """Median and mean microseconds per call of fn(text) over repeat passes."""
+    timings = []
+    for _ in range(repeat):
+        for t in texts:
+            start = time.perf_counter_ns()
+            fn(t)
+            timings.append(time.perf_counter_ns() - start)
+    return statistics.median(timings) / 1000, statistics.fmean(timings) / 1000
+
+
+def bench_fastpath(args):
+    detector = load_detector()
+    if detector.fast is None:
+        print("Fast path is not available for this model.")
+        return 1
+    vectorizer, model, fast = detector.vectorizer, detector.model, detector.fast
+    texts = sample_texts()
+
+    expected = model.predict_proba(vectorizer.transform(texts))[:, 1]
+    mismatches = [t for t, p in zip(texts, expected) if fast.score(t)[2] != float(p)]
+    print(f"Checked {len(texts)} texts against sklearn: {len(mismatches)} mismatches")
+    if mismatches:
+        for t in mismatches[:5]:
+            print(f"  - {t}")
+        return 1
+
+    sklearn_p50, sklearn_mean = time_per_call(
+        lambda t: model.predict_proba(vectorizer.transform([t]))[0][1], texts, args.repeat)
+    fast_p50, fast_mean = time_per_call(lambda t: fast.score(t)[2], texts, args.repeat)
+
+    print(f"{'path':<10}{'p50 (us)':>12}{'mean (us)':>12}")
+    print(f"{'sklearn':<10}{sklearn_p50:>12.1f}{sklearn_mean:>12.1f}")
+    print(f"{'fast':<10}{fast_p50:>12.1f}{fast_mean:>12.1f}")
+    print(f"Speedup (p50): {sklearn_p50 / fast_p50:.1f}x")
+    return 0
+
+
+def bench_parallel(args):
+    detector = load_detector()
+    base = sample_texts()
+    texts = [f"{base[i % len(base)]} ({i})" for i in range(args.rows)]
+    chunks = [texts[i:i + args.chunk] for i in range(0, len(texts), args.chunk)]
+    workers = args.workers or sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"{len(texts):,} rows in {len(chunks)} chunks, {os.cpu_count()} CPUs")
+
+    expected = None
+    baseline = None
+    print(f"{'workers':<10}{'seconds':>10}{'rows/s':>12}{'speedup':>10}{'efficiency':>12}")
+    for n in workers:
+        if n > 1:
+            pool = open_pool(detector, n)
+            # Start every worker before timing; process startup is a one-off cost per pool
+            list(pool.map(time.sleep, [0.5] * n))
+        else:
+            pool = None
+        start = time.perf_counter()
+        rows = [row for part in iter_scored_chunks(detector, chunks, n, pool=pool) for row in part]
+        elapsed = time.perf_counter() - start
+        if pool is not None:
+            pool.shutdown()
+        if expected is None:
+            expected = rows
+        elif rows != expected:
+            print(f"Results with {n} workers differ from {workers[0]} worker(s)")
+            return 1
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{n:<10}{elapsed:>10.2f}{len(texts) / elapsed:>12,.0f}{speedup:>9.2f}x{speedup / n:>11.0%}")
+    return 0
+
+
+async def _http_post(reader, writer, host, path, body):
+    """One keep-alive POST; returns the status code and the response body."""
+    writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _load_test(args, bodies):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + args.duration
+
+    async def client(offset):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter_ns()
+                status, _ = await _http_post(reader, writer, host, args.path, bodies[i % len(bodies)])
+                latencies.append(time.perf_counter_ns() - start)
+                errors += status != 200
+                i += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(args.connections)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def bench_server(args):
+    texts = sample_texts()
+    if args.batch:
+        args.path = "/score_batch"
+        bodies = [json.dumps({"texts": [texts[(i + j) % len(texts)] for j in range(args.batch)]}).encode("utf-8")
+                  for i in range(len(texts))]
+    else:
+        args.path = "/score"
+        bodies = [json.dumps({"text": t}).encode("utf-8") for t in texts]
+    try:
+        latencies, errors, elapsed = asyncio.run(_load_test(args, bodies))
+    except OSError as e:
+        print(f"Cannot reach {args.url}: {e}. Start it with: python server.py")
+        return 1
+    if not latencies:
+        print("No requests completed.")
+        return 1
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] / 1e6
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] / 1e6
+    per_request = args.batch or 1
+    print(f"{args.path}: {args.connections} keep-alive connections for {elapsed:.1f}s")
+    print(f"{'requests':<12}{'errors':>8}{'req/s':>10}{'texts/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    print(f"{len(latencies):<12,}{errors:>8}{len(latencies) / elapsed:>10,.0f}"
+          f"{len(latencies) * per_request / elapsed:>10,.0f}{p50:>10.2f}{p99:>10.2f}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("fastpath", help="Single-document latency, sklearn vs fast path")
+    p.add_argument("--repeat", type=int, default=200, help="Passes over the sample texts")
+    p.set_defaults(func=bench_fastpath)
+    p = sub.add_parser("parallel", help="Batch throughput by number of worker processes")
+    p.add_argument("--rows", type=int, default=200000, help="Synthetic rows to score")
+    p.add_argument("--chunk", type=int, default=PARALLEL_CHUNK_ROWS, help="Rows per worker task")
+    p.add_argument("--workers", type=int, nargs="+", help="Worker counts to try (default: 1 2 4 and the CPU count)")
+    p.set_defaults(func=bench_parallel)
+    p = sub.add_parser("server", help="Latency and throughput of a running server.py")
+    p.add_argument("--url", default="http://127.0.0.1:8502", help="Base URL of the scoring service")
+    p.add_argument("--connections", type=int, default=8, help="Concurrent keep-alive connections")
+    p.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    p.add_argument("--batch", type=int, default=0, help="Texts per /score_batch request (default: single /score requests)")
+    p.set_defaults(func=bench_server)
+    args = parser.parse_args()
+    sys.exit(args.func(args))
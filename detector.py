@@ -0,0 +1,681 @@
+"""
+Fake news scoring engine (TF-IDF + Logistic Regression).
+
+Everything in here is free of Streamlit so the same logic can be used by
+app.py, command-line tools and background jobs.
+
+Usage:
+  from detector import load_detector
+  detector = load_detector()
+  rows = detector.analyze_batch(df["text"], chunk_size=5000)
+"""
+
+import os
+import math
+import pickle
+import hashlib
+import threading
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import expit
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+from heuristics import load_rules
+from artifact import ARTIFACT_DIR, load_artifact
+
+# -----------------------------
+# Paths & Constants
+# -----------------------------
+VECTOR_PATH = "vectorizer.pkl"
+MODEL_PATH = "fake_news_model.pkl"
+
+CLASS_LABELS = {0: "FAKE", 1: "REAL"}
+ERROR_LABEL = "ERROR"
+
+MIN_TEXT_LENGTH = 5
+MAX_TEXT_LENGTH = 1000
+PREVIEW_LENGTH = 100
+DEFAULT_CHUNK_SIZE = 5000
+TOP_N_FEATURES = 5
+DEFAULT_CACHE_SIZE = 4096
+
+# Long-article (windowed) scoring
+WINDOW_SIZE = MAX_TEXT_LENGTH
+WINDOW_OVERLAP = 200
+MAX_WINDOWS = 64
+WORD_SNAP = 40  # how far a window edge may move to land on whitespace
+AGGREGATION_STRATEGIES = ("length_weighted", "mean", "median", "most_fake")
+
+# Texts the fast path is checked against sklearn with when a Detector is built
+FAST_PATH_PROBES = [
+    "SHOCKING!!! Government HIDING cure for cancer! Big Pharma secret!",
+    "Federal Reserve raises interest rates by quarter point citing inflation concerns.",
+    "Scientists at MIT announce breakthrough in battery technology according to research.",
+    "You won't believe what happens next",
+]
+
+
+# -----------------------------
+# Text Helpers
+# -----------------------------
+def clean_text(text, max_length=MAX_TEXT_LENGTH):
+    """
+    Validate and trim raw input the same way the Single News tab does.
+    Returns (text, error) where error is a user-facing message or None.
+    max_length=None keeps the full text (for windowed scoring).
+    """
+    text = str(text).strip()
+    if not text:
+        return None, "Please enter some text to analyze."
+    if len(text) < MIN_TEXT_LENGTH:
+        return None, f"Text is too short. Please enter at least {MIN_TEXT_LENGTH} characters."
+    return (text if max_length is None else text[:max_length]), None
+
+
+def label_for(prob):
+    """Map the REAL-class probability to a FAKE/REAL label."""
+    return CLASS_LABELS[1 if prob >= 0.5 else 0]
+
+
+def preview(text, length=PREVIEW_LENGTH):
+    """Short version of an article for result tables."""
+    text = str(text)
+    return text[:length] + "..." if len(text) > length else text
+
+
+# -----------------------------
+# Analysis Result
+# -----------------------------
+class AnalysisResult:
+    """
+    Everything a single analysis produces, computed from one vectorizer pass:
+    the sparse vector, the REAL probability, the strongest per-feature
+    contributions (sorted by absolute weight), the heuristic flags and the
+    raw heuristic matches with their offsets. Long articles scored in windows
+    also carry the per-window scores.
+    """
+
+    def __init__(self, text, X, prob, contributions, flags, matches=(), windows=None):
+        self.text = text
+        self.X = X
+        self.prob = prob
+        self.label = label_for(prob)
+        self.contributions = contributions
+        self.flags = flags
+        self.matches = list(matches)
+        self.windows = windows
+
+    def top_contributions(self, top_n=TOP_N_FEATURES):
+        """Strongest (feature, score) pairs; negative scores push towards FAKE."""
+        return self.contributions[:top_n]
+
+    def fake_words(self, top_n=TOP_N_FEATURES):
+        """Features among the top_n that contribute to FAKE."""
+        return [w for w, s in self.top_contributions(top_n) if s < 0]
+
+    def reasons(self, top_n=TOP_N_FEATURES):
+        """Human-readable reasons: the top_n model features, then every heuristic flag."""
+        reasons = []
+        for word, score in self.top_contributions(top_n):
+            if score < 0:
+                reasons.append(f"🔴 ML indicates '{word}' contributes to FAKE")
+            else:
+                reasons.append(f"🟢 ML indicates '{word}' contributes to REAL")
+        for kind, detail in self.flags:
+            if kind == "caps_punctuation":
+                reasons.append("⚠️ Heuristic: Excessive punctuation or all-caps detected")
+            elif kind == "clickbait":
+                reasons.append(f"🎯 Heuristic: Clickbait word detected '{detail}'")
+            else:
+                reasons.append(f"🎯 Heuristic: {kind.replace('_', ' ').capitalize()} signal '{detail}'")
+        return reasons
+
+
+def split_windows(text, size=WINDOW_SIZE, overlap=WINDOW_OVERLAP, max_windows=MAX_WINDOWS):
+    """
+    (start, end) character spans covering text in overlapping windows, with
+    edges snapped to whitespace where possible. When more than max_windows
+    would be needed the stride grows so the windows are spread evenly over the
+    article, which keeps the scoring cost bounded by max_windows * size.
+    """
+    n = len(text)
+    if n <= size:
+        return [(0, n)]
+    step = max(1, size - overlap)
+    count = -(-(n - size) // step) + 1
+    if count > max_windows:
+        count = max(2, max_windows)
+        step = -(-(n - size) // (count - 1))
+    spans = []
+    for k in range(count):
+        start = min(k * step, n - size)
+        end = start + size
+        if start > 0 and not text[start - 1].isspace():
+            cut = text.find(" ", start, start + WORD_SNAP)
+            if cut != -1:
+                start = cut + 1
+        if end < n and not text[end].isspace():
+            cut = text.rfind(" ", end - WORD_SNAP, end)
+            if cut > start:
+                end = cut
+        spans.append((start, end))
+    return spans
+
+
+def aggregate_probs(probs, weights, strategy="length_weighted"):
+    """
+    Combine per-window REAL probabilities into one document score:
+    length_weighted (by window length), mean, median, or most_fake
+    (the lowest window, so one strongly fake passage flags the article).
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    if strategy == "length_weighted":
+        return float(np.average(probs, weights=weights))
+    if strategy == "mean":
+        return float(np.mean(probs))
+    if strategy == "median":
+        return float(np.median(probs))
+    if strategy == "most_fake":
+        return float(np.min(probs))
+    raise ValueError(f"Unknown aggregation strategy '{strategy}'. Choose from: {', '.join(AGGREGATION_STRATEGIES)}")
+
+
+WindowScore = namedtuple("WindowScore", ["start", "end", "prob"])
+
+
+def fingerprint(text, lowercase=True):
+    """
+    Cache key for a cleaned text: whitespace runs collapsed and, when the
+    vectorizer lowercases anyway, case folded, so trivially different pastes
+    of the same headline share one entry.
+    """
+    text = " ".join(text.split())
+    if lowercase:
+        text = text.lower()
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+# -----------------------------
+# Prediction Cache
+# -----------------------------
+class PredictionCache:
+    """Thread-safe bounded LRU of model outputs with hit, miss and eviction counters."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """The cached value or None, without counting a lookup or refreshing its recency."""
+        with self._lock:
+            return self._data.get(key)
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def resize(self, maxsize):
+        """Change the bound, evicting least recently used entries if needed."""
+        with self._lock:
+            self.maxsize = max(0, int(maxsize))
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+# -----------------------------
+# Explanation Index
+# -----------------------------
+class ExplanationIndex:
+    """
+    Feature names and signed coefficients, extracted once per model load so
+    explanations never rebuild the vocabulary array. Top-k lookups cost
+    O(nnz) in the document's non-zero features. Hashing vectorizers have no
+    vocabulary, so their feature names are recovered from the document text.
+    """
+
+    def __init__(self, vectorizer, model):
+        if hasattr(vectorizer, "get_feature_names_out"):
+            self.feature_names = vectorizer.get_feature_names_out()
+            self.names_for = None
+        else:
+            self.feature_names = None
+            self.names_for = vectorizer.feature_names_for
+        if hasattr(model, "coef_"):
+            self.coef = np.asarray(model.coef_[0], dtype=np.float64)
+        else:
+            self.coef = None
+
+    def contributions(self, X):
+        """(feature ids, signed coef * tf-idf weight) for the first row of X."""
+        row = X.tocsr()[0]
+        return row.indices, self.coef[row.indices] * row.data
+
+    def top_contributions(self, X, top_n=TOP_N_FEATURES, text=None):
+        """
+        Strongest (feature, score) pairs for one document, sorted by |score|.
+        text is only needed to name features of a hashing vectorizer.
+        """
+        if self.coef is None or top_n <= 0:
+            return []
+        idx, scores = self.contributions(X)
+        weight = np.abs(scores)
+        if len(scores) > top_n:
+            picked = np.argpartition(-weight, top_n - 1)[:top_n]
+        else:
+            picked = np.arange(len(scores))
+        picked = picked[np.argsort(-weight[picked], kind="stable")]
+        if self.feature_names is not None:
+            return [(self.feature_names[idx[i]], float(scores[i])) for i in picked]
+        names = self.names_for(text) if text is not None else {}
+        return [(names.get(int(idx[i]), f"#{idx[i]}"), float(scores[i])) for i in picked]
+
+
+# -----------------------------
+# Single-document Fast Path
+# -----------------------------
+class FastLinearScorer:
+    """
+    Scores one document for a TfidfVectorizer + binary LogisticRegression
+    without sklearn's input validation and dispatch: analyze, look up the
+    vocabulary, apply idf and L2 normalization, then a sparse dot product with
+    coef_ and a sigmoid. Every step uses the same float64 operations in the
+    same order as sklearn/scipy, so probabilities are bit-for-bit identical;
+    Detector still checks this against sklearn before enabling it.
+    """
+
+    def __init__(self, vectorizer, model):
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.n_features = len(self.vocabulary)
+        self.idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+        self.coef = np.asarray(model.coef_[0], dtype=np.float64)
+        self.intercept = np.float64(model.intercept_[0])
+        self.binary = vectorizer.binary
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.l2 = vectorizer.norm == "l2"
+
+    @staticmethod
+    def supports(vectorizer, model):
+        """True for the model shapes the fast path reproduces exactly."""
+        return (
+            hasattr(vectorizer, "vocabulary_") and hasattr(vectorizer, "idf_")
+            and getattr(vectorizer, "use_idf", False) and vectorizer.norm in ("l2", None)
+            and vectorizer.dtype in (np.float64, float)
+            and hasattr(model, "coef_") and np.shape(model.coef_)[0] == 1
+            and len(getattr(model, "classes_", ())) == 2
+        )
+
+    def features(self, text):
+        """Sorted feature ids and their normalized tf-idf weights for one text."""
+        counts = {}
+        vocabulary = self.vocabulary
+        for term in self.analyzer(text):
+            i = vocabulary.get(term)
+            if i is not None:
+                counts[i] = counts.get(i, 0) + 1
+        indices = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+        if self.binary:
+            values = np.ones(len(indices), dtype=np.float64)
+        else:
+            values = np.fromiter((counts[i] for i in indices.tolist()), dtype=np.float64, count=len(indices))
+        if self.sublinear_tf:
+            np.log(values, values)
+            values += 1.0
+        values *= self.idf[indices]
+        if self.l2:
+            total = 0.0
+            for v in values.tolist():
+                total += v * v
+            if total != 0.0:
+                values /= math.sqrt(total)
+        return indices, values
+
+    def score(self, text):
+        """(feature ids, weights, probability of REAL) for one text."""
+        indices, values = self.features(text)
+        decision = 0.0
+        for v, c in zip(values.tolist(), self.coef[indices].tolist()):
+            decision += v * c
+        return indices, values, float(expit(np.float64(decision) + self.intercept))
+
+    def to_sparse(self, indices, values):
+        """Single-row CSR matrix equivalent to vectorizer.transform([text])."""
+        return sp.csr_matrix((values, indices, np.array([0, len(indices)])), shape=(1, self.n_features))
+
+
+# -----------------------------
+# Pre-scored Headline Table
+# -----------------------------
+ScoredHeadline = namedtuple(
+    "ScoredHeadline", ["headline", "label", "prob", "contributions", "flags", "matches"]
+)
+
+
+class HeadlineTable:
+    """
+    Immutable table of pre-scored headlines, built once per set of pools by
+    Detector.build_headline_table(). Lookups are plain dict indexing.
+    """
+
+    def __init__(self, rows, pools):
+        self._rows = MappingProxyType(dict(rows))
+        self.pools = MappingProxyType({name: tuple(items) for name, items in pools.items()})
+
+    def __getitem__(self, headline):
+        return self._rows[headline]
+
+    def __contains__(self, headline):
+        return headline in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, headline, default=None):
+        return self._rows.get(headline, default)
+
+    def pool(self, name):
+        """Scored rows of one pool, in pool order."""
+        return self.pools.get(name, ())
+
+    def analysis(self, headline):
+        """AnalysisResult for a scored headline (without the sparse vector), or None."""
+        row = self._rows.get(headline)
+        if row is None:
+            return None
+        return AnalysisResult(row.headline, None, row.prob, list(row.contributions), list(row.flags), row.matches)
+
+
+# -----------------------------
+# Detector
+# -----------------------------
+class Detector:
+    """Holds the fitted vectorizer, model and heuristic rules and scores text with them."""
+
+    def __init__(self, vectorizer, model, heuristics=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.index = ExplanationIndex(vectorizer, model)
+        self.heuristics = heuristics if heuristics is not None else load_rules()
+        self.cache = PredictionCache(cache_size)
+        self._lowercase = bool(getattr(vectorizer, "lowercase", False))
+        self.artifact_dir = None  # set when the arrays are memory-mapped from an artifact
+        self.fast = None
+        if FastLinearScorer.supports(vectorizer, model):
+            fast = FastLinearScorer(vectorizer, model)
+            if fast_path_matches(fast, vectorizer, model, FAST_PATH_PROBES):
+                self.fast = fast
+
+    def predict_proba(self, texts):
+        """Probability of REAL for each text, one sparse transform for the whole list."""
+        X = self.vectorizer.transform(texts)
+        return self.model.predict_proba(X)[:, 1]
+
+    def _score(self, text, details=True):
+        """
+        Model outputs for one cleaned text as (X, prob, top contributions),
+        served from the prediction cache when possible. With details=False
+        only prob is guaranteed; X and contributions may be None.
+        """
+        key = fingerprint(text, self._lowercase)
+        entry = self.cache.get(key)
+        # Only entries with contributions are complete; details=False entries may carry X without them
+        if entry is not None and (entry[2] is not None or not details):
+            return entry
+        if self.fast is not None:
+            indices, values, prob = self.fast.score(text)
+            X = self.fast.to_sparse(indices, values) if details else None
+        else:
+            X = self.vectorizer.transform([text])
+            prob = float(self.model.predict_proba(X)[0][1])
+        contributions = self.index.top_contributions(X, TOP_N_FEATURES, text) if details else None
+        entry = (X, prob, contributions)
+        self.cache.put(key, entry)
+        return entry
+
+    def score_long(self, texts, strategy="length_weighted", max_windows=MAX_WINDOWS):
+        """
+        Windowed scoring for full articles. Every window of every text is
+        vectorized in one sparse batch. Returns one (prob, [WindowScore], X)
+        per text, where X has one row per window.
+        """
+        if strategy not in AGGREGATION_STRATEGIES:
+            raise ValueError(f"Unknown aggregation strategy '{strategy}'. Choose from: {', '.join(AGGREGATION_STRATEGIES)}")
+        spans = [split_windows(t, max_windows=max_windows) for t in texts]
+        windows = [t[a:b] for t, doc_spans in zip(texts, spans) for a, b in doc_spans]
+        if not windows:
+            return []
+        X = self.vectorizer.transform(windows)
+        probs = self.model.predict_proba(X)[:, 1]
+        results, row = [], 0
+        for doc_spans in spans:
+            doc_probs = probs[row:row + len(doc_spans)]
+            weights = [b - a for a, b in doc_spans]
+            prob = aggregate_probs(doc_probs, weights, strategy)
+            scores = [WindowScore(a, b, float(p)) for (a, b), p in zip(doc_spans, doc_probs)]
+            results.append((prob, scores, X[row:row + len(doc_spans)]))
+            row += len(doc_spans)
+        return results
+
+    def analyze_full(self, text, top_n=TOP_N_FEATURES, long_strategy=None):
+        """
+        Score a single text and build its AnalysisResult in one pass.
+        Returns (result, error); result is None when the input is invalid.
+        With long_strategy set, texts longer than MAX_TEXT_LENGTH are scored in
+        windows (see score_long) instead of being truncated; contributions then
+        come from the mean window vector.
+        """
+        raw = str(text)
+        if long_strategy and len(raw.strip()) > MAX_TEXT_LENGTH:
+            text, error = clean_text(raw, max_length=None)
+            if error:
+                return None, error
+            prob, windows, X = self.score_long([text], long_strategy)[0]
+            doc = sp.csr_matrix(np.asarray(X.mean(axis=0)))
+            contributions = self.index.top_contributions(doc, top_n, text)
+            matches = self.heuristics.scan(raw)
+            flags = self.heuristics.flags(raw, matches)
+            return AnalysisResult(raw, doc, prob, contributions, flags, matches, windows), None
+        text, error = clean_text(raw)
+        if error:
+            return None, error
+        X, prob, contributions = self._score(text)
+        if top_n != TOP_N_FEATURES:
+            contributions = self.index.top_contributions(X, top_n, text)
+        matches = self.heuristics.scan(raw)
+        flags = self.heuristics.flags(raw, matches)
+        return AnalysisResult(raw, X, prob, contributions, flags, matches), None
+
+    def analyze_many(self, texts, top_n=TOP_N_FEATURES, chunk_size=DEFAULT_CHUNK_SIZE, long_strategy=None):
+        """
+        analyze_full for a list of texts with one transform and one
+        predict_proba per chunk instead of one per text. Returns a list of
+        (result, error) in input order. Like score_batch, it leaves the
+        prediction cache alone.
+        """
+        texts = [str(t) for t in texts]
+        out = [None] * len(texts)
+        chunk_size = max(1, int(chunk_size))
+        for start in range(0, len(texts), chunk_size):
+            positions, valid = [], []
+            for pos in range(start, min(start + chunk_size, len(texts))):
+                raw = texts[pos]
+                if long_strategy and len(raw.strip()) > MAX_TEXT_LENGTH:
+                    out[pos] = self.analyze_full(raw, top_n, long_strategy)
+                    continue
+                text, error = clean_text(raw)
+                if error:
+                    out[pos] = (None, error)
+                    continue
+                positions.append(pos)
+                valid.append(text)
+            if not valid:
+                continue
+            X = self.vectorizer.transform(valid)
+            probs = self.model.predict_proba(X)[:, 1]
+            for row, (pos, text) in enumerate(zip(positions, valid)):
+                raw, doc = texts[pos], X[row]
+                contributions = self.index.top_contributions(doc, top_n, text)
+                matches = self.heuristics.scan(raw)
+                flags = self.heuristics.flags(raw, matches)
+                out[pos] = (AnalysisResult(raw, doc, float(probs[row]), contributions, flags, matches), None)
+        return out
+
+    def analyze(self, text):
+        """Score a single text. Returns (label, prob) or (None, None) for invalid input."""
+        text, error = clean_text(text)
+        if error:
+            return None, None
+        prob = self._score(text, details=False)[1]
+        return label_for(prob), prob
+
+    def build_headline_table(self, pools):
+        """
+        Score every headline in pools ({name: [headline, ...]}) with a single
+        transform and return a HeadlineTable. Invalid headlines are left out.
+        """
+        unique = list(dict.fromkeys(h for headlines in pools.values() for h in headlines))
+        headlines, cleaned = [], []
+        for h in unique:
+            text, error = clean_text(h)
+            if error is None:
+                headlines.append(h)
+                cleaned.append(text)
+        rows = {}
+        if cleaned:
+            X = self.vectorizer.transform(cleaned)
+            probs = self.model.predict_proba(X)[:, 1]
+            for i, h in enumerate(headlines):
+                prob = float(probs[i])
+                matches = tuple(self.heuristics.scan(h))
+                rows[h] = ScoredHeadline(
+                    h, label_for(prob), prob,
+                    tuple(self.index.top_contributions(X[i], TOP_N_FEATURES, cleaned[i])),
+                    tuple(self.heuristics.flags(h, matches)),
+                    matches
+                )
+        scored_pools = {name: [rows[h] for h in items if h in rows] for name, items in pools.items()}
+        return HeadlineTable(rows, scored_pools)
+
+    def score_batch(self, texts, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, long_strategy=None):
+        """
+        Score many texts with one transform and one predict_proba per chunk.
+        Returns a list of (label, prob); invalid rows come back as (ERROR, None).
+        progress, if given, is called as progress(done, total) after each chunk.
+        Cached predictions are reused, but batch results are not added to the
+        cache and batch reads are not counted in its stats, so a large upload
+        neither evicts the hot interactive entries nor skews the hit rate.
+        With long_strategy set, over-long texts are scored in windows instead
+        of being truncated.
+        """
+        texts = list(texts)
+        total = len(texts)
+        results = [(ERROR_LABEL, None)] * total
+        chunk_size = max(1, int(chunk_size))
+        for start in range(0, total, chunk_size):
+            positions, valid = [], []
+            long_positions, long_texts = [], []
+            for offset, raw in enumerate(texts[start:start + chunk_size]):
+                text, error = clean_text(raw, max_length=None if long_strategy else MAX_TEXT_LENGTH)
+                if error is not None:
+                    continue
+                if len(text) > MAX_TEXT_LENGTH:
+                    long_positions.append(start + offset)
+                    long_texts.append(text)
+                    continue
+                # peek(): an upload's rows would otherwise swamp the interactive hit rate and recency
+                entry = self.cache.peek(fingerprint(text, self._lowercase)) if self.cache.maxsize else None
+                if entry is not None:
+                    results[start + offset] = (label_for(entry[1]), entry[1])
+                else:
+                    positions.append(start + offset)
+                    valid.append(text)
+            if valid:
+                probs = self.predict_proba(valid)
+                for pos, prob in zip(positions, probs):
+                    prob = float(prob)
+                    results[pos] = (label_for(prob), prob)
+            if long_texts:
+                for pos, (prob, _, _) in zip(long_positions, self.score_long(long_texts, long_strategy)):
+                    results[pos] = (label_for(prob), prob)
+            if progress is not None:
+                progress(min(start + chunk_size, total), total)
+        return results
+
+    def analyze_batch(self, texts, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, long_strategy=None):
+        """
+        Batch analysis producing the same rows as the CSV/Batch tab:
+        {"text": preview, "prediction": FAKE/REAL/ERROR, "confidence": "87.5%"}.
+        """
+        texts = list(texts)
+        rows = []
+        for raw, (label, prob) in zip(texts, self.score_batch(texts, chunk_size, progress, long_strategy)):
+            rows.append({
+                "text": preview(raw),
+                "prediction": label,
+                "confidence": f"{(prob or 0.0)*100:.1f}%"
+            })
+        return rows
+
+
+def fast_path_matches(fast, vectorizer, model, texts):
+    """True when the fast path reproduces sklearn's probabilities exactly for every text."""
+    expected = model.predict_proba(vectorizer.transform(texts))[:, 1]
+    return all(fast.score(t)[2] == float(p) for t, p in zip(texts, expected))
+
+
+def load_detector(vector_path=VECTOR_PATH, model_path=MODEL_PATH, artifact_dir=ARTIFACT_DIR,
+                  cache_size=DEFAULT_CACHE_SIZE):
+    """
+    Build a Detector, preferring the memory-mapped artifact in artifact_dir
+    (see artifact.py) and falling back to the pickled vectorizer and model.
+    """
+    if artifact_dir and os.path.isdir(artifact_dir):
+        vectorizer, model = load_artifact(artifact_dir)
+        detector = Detector(vectorizer, model, cache_size=cache_size)
+        detector.artifact_dir = artifact_dir
+        return detector
+    with open(vector_path, "rb") as f:
+        vectorizer = pickle.load(f)
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    return Detector(vectorizer, model, cache_size=cache_size)
@@ -0,0 +1,114 @@
+"""
+Stateless hashing feature mode for the fake news model.
+
+HashingTfidfVectorizer is a drop-in replacement for TfidfVectorizer that
+hashes terms straight into n_features columns. There is no vocabulary to
+hold in memory, pickle or share between processes; the only fitted state is
+the idf vector. Any worker that knows the parameters can extract features, so
+batch jobs parallelize trivially.
+
+Usage:
+  python train_model.py --hashing                 # train in hashing mode
+"""
+
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+DEFAULT_N_FEATURES = 2 ** 18
+
+
+class HashingTfidfVectorizer:
+    """Hashed term counts -> stored idf -> L2 normalization, with the TfidfVectorizer interface used here."""
+
+    def __init__(self, n_features=DEFAULT_N_FEATURES, ngram_range=(1, 2), stop_words="english",
+                 lowercase=True, norm="l2", smooth_idf=True, sublinear_tf=False):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.stop_words = stop_words
+        self.lowercase = lowercase
+        self.norm = norm
+        self.smooth_idf = smooth_idf
+        self.sublinear_tf = sublinear_tf
+        self.idf_ = None
+        self._setup()
+
+    def _setup(self):
+        self._hasher = HashingVectorizer(
+            n_features=self.n_features, ngram_range=self.ngram_range, stop_words=self.stop_words,
+            lowercase=self.lowercase, alternate_sign=False, norm=None
+        )
+        self._tfidf = TfidfTransformer(norm=self.norm, smooth_idf=self.smooth_idf, sublinear_tf=self.sublinear_tf)
+        if self.idf_ is not None:
+            self._tfidf.idf_ = self.idf_
+        self._analyzer = None
+        self._term_hasher = None
+
+    def __getstate__(self):
+        # Only the parameters and the idf vector are worth persisting
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+
+    @classmethod
+    def from_idf(cls, idf, **params):
+        """Rebuild a fitted vectorizer from its parameters and a stored idf vector."""
+        vectorizer = cls(**params)
+        vectorizer.idf_ = idf
+        vectorizer._tfidf.idf_ = idf
+        return vectorizer
+
+    def get_params(self):
+        return {
+            "n_features": self.n_features, "ngram_range": self.ngram_range, "stop_words": self.stop_words,
+            "lowercase": self.lowercase, "norm": self.norm, "smooth_idf": self.smooth_idf,
+            "sublinear_tf": self.sublinear_tf
+        }
+
+    def fit(self, texts):
+        """Learn the idf vector from hashed term counts."""
+        self._tfidf.fit(self._hasher.transform(texts))
+        self.idf_ = self._tfidf.idf_
+        return self
+
+    def transform(self, texts):
+        if self.idf_ is None:
+            raise ValueError("HashingTfidfVectorizer is not fitted; call fit() first.")
+        return self._tfidf.transform(self._hasher.transform(texts), copy=False)
+
+    def fit_transform(self, texts):
+        return self.fit(texts).transform(texts)
+
+    def build_analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = self._hasher.build_analyzer()
+        return self._analyzer
+
+    def feature_names_for(self, text):
+        """
+        {column: term} for the terms of one document. Hashing keeps no
+        vocabulary, so explanations recover names from the text itself;
+        colliding terms are joined with " / ".
+        """
+        if self._term_hasher is None:
+            self._term_hasher = FeatureHasher(n_features=self.n_features, input_type="string", alternate_sign=False)
+        terms = list(dict.fromkeys(self.build_analyzer()(text)))
+        if not terms:
+            return {}
+        columns = self._term_hasher.transform([[t] for t in terms]).tocsr().indices
+        names = {}
+        for column, term in zip(columns.tolist(), terms):
+            names[column] = f"{names[column]} / {term}" if column in names else term
+        return names
+
+
+def is_hashing(vectorizer):
+    return isinstance(vectorizer, HashingTfidfVectorizer)
+
+
+def feature_mode(vectorizer):
+    """Short description for the UI."""
+    if is_hashing(vectorizer):
+        return f"Hashed TF-IDF ({vectorizer.n_features:,} buckets)"
+    return "TF-IDF Vectorization"
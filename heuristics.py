@@ -0,0 +1,160 @@
+"""
+Heuristic rule engine for clickbait and styling signals.
+
+Rules live in heuristic_rules.json and are compiled once, one regular
+expression per kind, and scan() makes one pass per kind so the kinds never
+hide each other's matches (an all-caps run still reports the clickbait
+phrase inside it). The phrases of a kind are merged into a trie first and
+the regex is built from the trie, so at every position the engine follows
+a single branch per character instead of trying each phrase in turn: the
+cost of a pass grows with the text and the longest phrase, not with the
+number of phrases. Phrases are matched at every position, so overlapping
+phrases ("you won't believe" / "won't believe what happens next") are all
+reported.
+
+Rule file layout:
+  {
+    "phrases":  {"clickbait": ["shocking", "you won't believe", ...]},
+    "patterns": {"punctuation": ["!{3,}"], "caps": ["..."]}
+  }
+Phrases are matched case-insensitively on word boundaries; patterns are
+raw regular expressions and keep their own case sensitivity.
+"""
+
+import os
+import re
+import json
+from collections import namedtuple
+
+RULES_PATH = "heuristic_rules.json"
+
+# Used when the rule file is missing so the app keeps its original checks
+DEFAULT_RULES = {
+    "phrases": {"clickbait": ["shocking", "unbelievable", "you won't believe"]},
+    "patterns": {"punctuation": ["!{3,}"]}
+}
+
+# Kinds that raise the "excessive punctuation or all-caps" flag
+STYLE_KINDS = ("punctuation", "caps")
+
+HeuristicMatch = namedtuple("HeuristicMatch", ["kind", "rule", "start", "end"])
+
+_APOSTROPHES = "'\u2019"
+
+
+def _normalize_phrase(phrase):
+    return re.sub(r"\s+", " ", phrase.lower().replace("\u2019", "'"))
+
+
+def _token_regex(ch):
+    """Regex for one character of a normalized phrase, letting apostrophes and whitespace vary."""
+    if ch == "'":
+        return f"[{_APOSTROPHES}]"
+    if ch == " ":
+        return r"\s+"
+    return re.escape(ch)
+
+
+def _phrase_regex(phrase):
+    return "".join(_token_regex(ch) for ch in _normalize_phrase(phrase))
+
+
+def _trie_regex(node):
+    """
+    Regex for the phrases in a trie ({char: child}, with "" marking a phrase
+    end). Siblings start with different characters, so matching never tries
+    more than one branch; optional tails keep the longest phrase first.
+    """
+    branches = [_token_regex(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    return f"(?:{body})?" if "" in node else body
+
+
+class HeuristicEngine:
+    """A compiled rule set. Build with load_rules() or HeuristicEngine(rules_dict)."""
+
+    def __init__(self, rules):
+        self.phrases = {}  # (kind, normalized phrase) -> phrase as written in the rules
+        self._shorter = {}  # (kind, normalized phrase) -> anchored regexes of its phrase prefixes
+        self.passes = []  # (kind, compiled regex, whether it matches phrases)
+        for kind, phrases in rules.get("phrases", {}).items():
+            trie = {}
+            for p in phrases:
+                key = _normalize_phrase(p.strip())
+                if not key or (kind, key) in self.phrases:
+                    continue
+                self.phrases[kind, key] = p.strip()
+                node = trie
+                for ch in key:
+                    node = node.setdefault(ch, {})
+                node[""] = {}
+            if not trie:
+                continue
+            self._index_prefixes(kind)
+            # Zero-width, so finditer tries every position and overlapping phrases are all found
+            self.passes.append((kind, re.compile(f"(?=(?i:\\b({_trie_regex(trie)})\\b))"), True))
+        for kind, patterns in rules.get("patterns", {}).items():
+            for pattern in patterns:
+                re.compile(pattern)  # fail early with the offending rule
+            if patterns:
+                self.passes.append((kind, re.compile("|".join(f"(?:{p})" for p in patterns)), False))
+
+    def _index_prefixes(self, kind):
+        """
+        The trie regex reports the longest phrase at a position; remember
+        which shorter phrases of the kind are prefixes of each phrase.
+        """
+        for k, key in self.phrases:
+            if k != kind:
+                continue
+            shorter = [key[:i] for i in range(1, len(key)) if (kind, key[:i]) in self.phrases]
+            if shorter:
+                self._shorter[kind, key] = [(k2, re.compile(f"(?i:{_phrase_regex(k2)})\\b")) for k2 in shorter]
+
+    def scan(self, text):
+        """All rule matches in text, by position, as HeuristicMatch(kind, rule, start, end)."""
+        matches = []
+        for kind, regex, phrases in self.passes:
+            if not phrases:
+                matches.extend(HeuristicMatch(kind, m.group(0), m.start(), m.end()) for m in regex.finditer(text))
+                continue
+            for m in regex.finditer(text):
+                key = _normalize_phrase(m.group(1))
+                rule = self.phrases.get((kind, key), m.group(1))
+                matches.append(HeuristicMatch(kind, rule, m.start(1), m.end(1)))
+                for shorter, anchored in self._shorter.get((kind, key), ()):
+                    hit = anchored.match(text, m.start(1))
+                    if hit:
+                        matches.append(HeuristicMatch(kind, self.phrases[kind, shorter], hit.start(), hit.end()))
+        matches.sort(key=lambda m: (m.start, -m.end))
+        return matches
+
+    def flags(self, text, matches=None):
+        """
+        Summarize matches as (kind, detail) flags: one ("caps_punctuation", None)
+        for any styling hit or all-caps text, then one (kind, phrase) per distinct phrase.
+        """
+        if matches is None:
+            matches = self.scan(text)
+        flags = []
+        if text.isupper() or any(m.kind in STYLE_KINDS for m in matches):
+            flags.append(("caps_punctuation", None))
+        seen = set()
+        for m in matches:
+            if m.kind in STYLE_KINDS or (m.kind, m.rule) in seen:
+                continue
+            seen.add((m.kind, m.rule))
+            flags.append((m.kind, m.rule))
+        return flags
+
+
+def load_rules(path=RULES_PATH):
+    """Read and compile a rule file, falling back to the built-in rules if it is missing."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+    else:
+        rules = DEFAULT_RULES
+    return HeuristicEngine(rules)
@@ -0,0 +1,365 @@
+"""
+Background batch jobs that outlive Streamlit reruns and server restarts.
+
+A job is a directory under JOBS_DIR holding a copy of the uploaded CSV, a
+job.json state file and the results. Jobs run on a small thread pool owned
+by a JobManager (one per server, kept in st.cache_resource); each job can in
+turn fan its chunks out to worker processes (see batch.iter_scored_chunks).
+
+Progress is checkpointed after every chunk: the chunk's rows are written
+to parts/part-NNNNNN.<fmt> and only then is job.json atomically replaced
+with the new chunk count, row and label totals. A job interrupted by a
+crash is picked up again by resume_pending(): part files past the last
+checkpoint are discarded, scoring restarts at the next chunk, and the
+near-duplicate index (when used) is rebuilt by re-clustering the finished
+chunks, which reproduces the same cluster ids. When every chunk is done the
+parts are merged into the CSV/Parquet/Arrow result files and indexed into
+a SQLite result store for paginated browsing (see result_store.py).
+
+Several servers (Streamlit replicas) may share JOBS_DIR. Whoever runs a job
+holds an exclusive lock on its job.lock from start to finish, and
+resume_pending() only restarts the unfinished jobs whose lock it can take,
+so a job another process is still running is left alone. Job ids are
+checked against the format submit() generates before they are turned into
+paths, since the app takes them from the URL.
+
+Usage:
+  manager = JobManager(load_detector())
+  manager.resume_pending()
+  job_id = manager.submit(open("articles.csv", "rb"), "articles.csv")
+  manager.status(job_id).progress
+"""
+
+import os
+import re
+import json
+import shutil
+import secrets
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from batch import (EXPORT_FORMATS, LABELS, PARALLEL_CHUNK_ROWS, TEXT_COLUMN, Deduplicator, RecordWriter,
+                   assign_clusters, iter_records, iter_scored_records, read_columns, record_columns)
+from near_duplicates import NearDuplicateIndex
+from result_store import ResultStore
+
+JOBS_DIR = "batch_jobs"
+JOB_CHUNK_ROWS = PARALLEL_CHUNK_ROWS
+MAX_JOB_THREADS = 2
+KEEP_JOBS = 20
+STATE_FILE = "job.json"
+INPUT_FILE = "input.csv"
+PARTS_DIR = "parts"
+CLUSTERS_FILE = "clusters.csv"
+STORE_FILE = "results.sqlite"
+LOCK_FILE = "job.lock"
+JOB_ID = re.compile(r"\d{8}-\d{6}-[0-9a-f]{6}")
+# Parquet keeps the result types in the checkpoints; CSV when pyarrow is missing
+PART_FORMAT = "parquet" if "parquet" in EXPORT_FORMATS else "csv"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _try_lock(path):
+    """path opened and exclusively locked, or None while another process holds the lock."""
+    f = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    f.close()
+
+
+def _read_part(path):
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+    else:
+        # Texts stay as written; only an empty probability (an ERROR row) is missing
+        frame = pd.read_csv(path, keep_default_na=False, na_values={"probability": [""]},
+                            dtype={"probability": "float64"})
+    return frame.replace({float("nan"): None}).to_dict("records")
+
+
+class BatchJob:
+    """Read-only view of a job's state file plus helpers to load its results."""
+
+    def __init__(self, path, state):
+        self.path = path
+        self.state = state
+
+    def __getattr__(self, name):
+        try:
+            return self.state[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def progress(self):
+        """Fraction of the input read at the last checkpoint."""
+        if self.status == DONE:
+            return 1.0
+        return min(1.0, self.bytes_done / self.total_bytes) if self.total_bytes else 0.0
+
+    @property
+    def dedup_ratio(self):
+        return 1 - self.scored / self.rows_done if self.rows_done else 0.0
+
+    @property
+    def paths(self):
+        """{format: result file} once the job is done."""
+        if self.status != DONE:
+            return {}
+        return {fmt: os.path.join(self.path, f"results.{fmt}") for fmt in EXPORT_FORMATS}
+
+    def part_paths(self):
+        return [os.path.join(self.path, PARTS_DIR, f"part-{i:06d}.{PART_FORMAT}") for i in range(self.chunks_done)]
+
+    def store(self):
+        """
+        The indexed result store of a finished job, built from the
+        checkpoints on first use for jobs that predate it.
+        """
+        path = os.path.join(self.path, STORE_FILE)
+        if os.path.exists(path):
+            return ResultStore(path)
+        return ResultStore.build(path, (_read_part(p) for p in self.part_paths()), self.options["clusters"])
+
+    def cluster_frame(self):
+        path = os.path.join(self.path, CLUSTERS_FILE)
+        return pd.read_csv(path) if os.path.exists(path) else pd.DataFrame()
+
+
+class JobManager:
+    """Submits, runs, checkpoints and resumes batch jobs for one detector."""
+
+    def __init__(self, detector, root=JOBS_DIR, threads=MAX_JOB_THREADS, workers=1):
+        self.detector = detector
+        self.root = root
+        self.workers = workers
+        os.makedirs(root, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="batch-job")
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def _dir(self, job_id):
+        if not self.valid_id(job_id):
+            raise ValueError(f"Invalid job id {job_id!r}")
+        return os.path.join(self.root, job_id)
+
+    @staticmethod
+    def valid_id(job_id):
+        """Whether job_id has the form submit() generates (and so stays inside root)."""
+        return isinstance(job_id, str) and JOB_ID.fullmatch(job_id) is not None
+
+    def _load_state(self, job_id):
+        path = os.path.join(self._dir(job_id), STATE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, job_id, state):
+        state["updated"] = datetime.now().isoformat(timespec="seconds")
+        _write_json_atomic(os.path.join(self._dir(job_id), STATE_FILE), state)
+
+    def status(self, job_id):
+        """BatchJob for job_id, or None if it does not exist or is not a job id."""
+        if not self.valid_id(job_id):
+            return None
+        state = self._load_state(job_id)
+        return BatchJob(self._dir(job_id), state) if state is not None else None
+
+    def jobs(self):
+        """All jobs on disk, newest first."""
+        found = [self.status(name) for name in sorted(os.listdir(self.root), reverse=True) if self.valid_id(name)]
+        return [job for job in found if job is not None]
+
+    def submit(self, source, name, clusters=False, representatives=False, long_strategy=None):
+        """
+        Copy source (a binary file object) into a new job directory, queue
+        the job and return its id. Raises ValueError when the CSV has no
+        text column.
+        """
+        if TEXT_COLUMN not in read_columns(source):
+            raise ValueError(f"CSV must have a '{TEXT_COLUMN}' column!")
+        job_id = f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(3)}"
+        path = self._dir(job_id)
+        os.makedirs(os.path.join(path, PARTS_DIR))
+        # Locked before job.json exists, so no other process's resume_pending() can take the job
+        lock = _try_lock(os.path.join(path, LOCK_FILE))
+        with open(os.path.join(path, INPUT_FILE), "wb") as f:
+            shutil.copyfileobj(source, f)
+        state = {
+            "id": job_id,
+            "name": name,
+            "status": QUEUED,
+            "options": {"clusters": bool(clusters or representatives), "representatives": bool(representatives),
+                        "long_strategy": long_strategy},
+            "total_bytes": os.path.getsize(os.path.join(path, INPUT_FILE)),
+            "bytes_done": 0,
+            "chunks_done": 0,
+            "rows_done": 0,
+            "scored": 0,
+            "counts": {label: 0 for label in LABELS},
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "error": None,
+        }
+        self._save_state(job_id, state)
+        self._prune()
+        self._start(job_id, lock)
+        return job_id
+
+    def resume_pending(self):
+        """
+        Restart every job left queued or running by a process that is gone;
+        jobs whose lock another process (or thread) holds are still running
+        there and are skipped.
+        """
+        resumed = []
+        for job in self.jobs():
+            if job.finished:
+                continue
+            lock = _try_lock(os.path.join(job.path, LOCK_FILE))
+            if lock is None:
+                continue
+            state = self._load_state(job.id)  # it may have finished before we got the lock
+            if state is None or state["status"] in (DONE, FAILED):
+                _unlock(lock)
+                continue
+            self._start(job.id, lock)
+            resumed.append(job.id)
+        return resumed
+
+    def _start(self, job_id, lock):
+        """Queue job_id on the pool; the job's lock is held until its run ends."""
+        with self._lock:
+            if job_id in self._active:
+                _unlock(lock)
+                return
+            self._active.add(job_id)
+        self._pool.submit(self._run, job_id, lock)
+
+    def _prune(self):
+        """Delete the oldest finished jobs beyond KEEP_JOBS."""
+        finished = [job for job in self.jobs() if job.finished]
+        for job in finished[KEEP_JOBS:]:
+            shutil.rmtree(job.path, ignore_errors=True)
+
+    def _run(self, job_id, lock):
+        state = self._load_state(job_id)
+        try:
+            state["status"] = RUNNING
+            self._save_state(job_id, state)
+            clusters = self._score(job_id, state)
+            self._finalize(job_id, state, clusters)
+            state["status"] = DONE
+        except Exception as e:  # the job records the failure; the server keeps running
+            state["status"] = FAILED
+            state["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            self._save_state(job_id, state)
+            with self._lock:
+                self._active.discard(job_id)
+            _unlock(lock)
+
+    def _score(self, job_id, state):
+        path = self._dir(job_id)
+        options = state["options"]
+        done = state["chunks_done"]
+        job = BatchJob(path, state)
+        parts = job.part_paths()
+        for name in os.listdir(os.path.join(path, PARTS_DIR)):
+            if os.path.join(path, PARTS_DIR, name) not in parts:
+                os.remove(os.path.join(path, PARTS_DIR, name))  # written after the last checkpoint
+
+        clusters = None
+        if options["clusters"]:
+            clusters = NearDuplicateIndex(representatives=options["representatives"])
+        dedup = Deduplicator(self.detector, long_strategy=options["long_strategy"])
+        scored_before = state["scored"]
+        columns = record_columns(clusters=clusters is not None)
+
+        with open(os.path.join(path, INPUT_FILE), "rb") as f:
+            def remaining():
+                for i, chunk in enumerate(iter_records(f, "csv", JOB_CHUNK_ROWS, TEXT_COLUMN)):
+                    if i >= done:
+                        yield chunk
+                    elif clusters is not None:
+                        # Replay finished chunks so the index gives the same ids as before the restart
+                        assign_clusters(clusters, chunk[1], dedup.max_length)
+                        for row in _read_part(parts[i]):
+                            clusters.observe(row["cluster"], row["prediction"], row["probability"])
+
+            rows_iter = iter_scored_records(self.detector, remaining(), long_strategy=options["long_strategy"],
+                                            workers=self.workers, dedup=dedup, clusters=clusters)
+            for rows in rows_iter:
+                index = state["chunks_done"]
+                part = os.path.join(path, PARTS_DIR, f"part-{index:06d}.{PART_FORMAT}")
+                tmp = f"{part}.tmp"
+                with RecordWriter(tmp, PART_FORMAT, columns) as writer:
+                    writer.write(rows)
+                os.replace(tmp, part)
+                state["chunks_done"] = index + 1
+                state["rows_done"] += len(rows)
+                # Counted when chunks are dispatched, so with workers it may run a few chunks ahead
+                state["scored"] = scored_before + dedup.scored
+                for row in rows:
+                    state["counts"][row["prediction"]] += 1
+                state["bytes_done"] = min(f.tell(), state["total_bytes"])
+                self._save_state(job_id, state)
+        return clusters
+
+    def _finalize(self, job_id, state, clusters):
+        """Merge the checkpoint parts into the result files and the result store."""
+        path = self._dir(job_id)
+        job = BatchJob(path, state)
+        columns = record_columns(clusters=clusters is not None)
+        writers = [RecordWriter(os.path.join(path, f"results.{fmt}"), fmt, columns) for fmt in EXPORT_FORMATS]
+        try:
+            for part in job.part_paths():
+                rows = _read_part(part)
+                for writer in writers:
+                    writer.write(rows)
+        finally:
+            for writer in writers:
+                writer.close()
+        ResultStore.build(os.path.join(path, STORE_FILE), (_read_part(p) for p in job.part_paths()), clusters is not None)
+        if clusters is not None:
+            pd.DataFrame(clusters.summary()).to_csv(os.path.join(path, CLUSTERS_FILE), index=False)
+            state["clusters"] = len(clusters)
+        state["bytes_done"] = state["total_bytes"]
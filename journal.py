@@ -0,0 +1,321 @@
+"""
+Crash-safe key/value persistence as a snapshot plus an append-only journal.
+
+Every change (set or delete of one key) is appended to <base>.journal as one
+JSON line with a sequence number, instead of rewriting and backing up the
+whole file. Appends are flushed to the OS immediately but fsync'ed in
+batches: after SYNC_EVERY records, or at most SYNC_INTERVAL seconds after
+the first unsynced one, so a burst of writes shares one fsync. A crash can
+lose at most the records of the current batch.
+
+Once the journal holds COMPACT_RECORDS records, or SNAPSHOT_INTERVAL seconds
+have passed since the last snapshot, the whole map is written to
+<base>.snapshot.json (tmp file, fsync, rename) and the journal is started
+afresh. Recovery loads the snapshot and replays the journal records newer
+than it; a torn last line from a crash mid-append is cut off.
+
+Several processes (e.g. Streamlit replicas) may share the files. Appends and
+compactions hold an exclusive lock on <base>.lock; under it a writer first
+replays the records other processes appended, so sequence numbers come from
+the file, not from one process's counter. Readers call changed_on_disk(),
+which only stats the files, and refresh() to replay what others wrote;
+changes() then tells which keys moved, so a derived index (see
+leaderboard.py) can be updated instead of rebuilt.
+
+Usage:
+  board = JournaledDict("leaderboard", legacy_path="leaderboard.json")
+  board.set("Player", {"score": 17, "date": "2026-02-16 19:29"})
+  board.refresh()
+  board.get("Player")
+"""
+
+import os
+import json
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SNAPSHOT_SUFFIX = ".snapshot.json"
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+SYNC_EVERY = 32
+SYNC_INTERVAL = 1.0
+COMPACT_RECORDS = 1000
+SNAPSHOT_INTERVAL = 600.0
+
+
+def _fsync_dir(path):
+    """Make a rename in path's directory durable (no-op where directories cannot be opened)."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _signature(path, inode=False):
+    """What changes when another process writes path: (mtime, size), plus the inode for replaced files."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size) if inode else (st.st_mtime_ns, st.st_size)
+
+
+class JournaledDict:
+    """A dict of JSON values persisted as <base>.snapshot.json plus <base>.journal."""
+
+    def __init__(self, base, legacy_path=None, sync_every=SYNC_EVERY, sync_interval=SYNC_INTERVAL,
+                 compact_records=COMPACT_RECORDS, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.snapshot_path = base + SNAPSHOT_SUFFIX
+        self.journal_path = base + JOURNAL_SUFFIX
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_records = compact_records
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.RLock()
+        self._lock_file = open(base + LOCK_SUFFIX, "a+b")
+        self._timer = None
+        self._pending = 0
+        self.data, self.seq = {}, 0
+        self._offset = 0  # bytes of the journal replayed into data
+        self._journal_records = 0
+        self._snapshot_sig = self._journal_sig = None
+        self._unseen = None  # keys changed since the last changes(); None means all of them
+        with self._file_lock():
+            if (not os.path.exists(self.snapshot_path) and not os.path.exists(self.journal_path)
+                    and legacy_path and os.path.exists(legacy_path)):
+                # First start next to the old whole-file JSON: it becomes the first snapshot
+                try:
+                    with open(legacy_path, "r", encoding="utf-8") as f:
+                        legacy = json.load(f)
+                except (OSError, ValueError):
+                    legacy = {}
+                self._write_snapshot(legacy, 0)
+            self._journal = open(self.journal_path, "ab")
+            self._replay()
+        self._snapshot_time = time.monotonic()
+        atexit.register(self.close)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive across threads (RLock) and processes (lock on <base>.lock)."""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                        pass
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._lock_file.seek(0)
+                    msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _replay(self):
+        """Bring data up to date with the files; call with the file lock held."""
+        snapshot_sig = _signature(self.snapshot_path, inode=True)
+        reloaded = snapshot_sig != self._snapshot_sig
+        if reloaded:
+            data, seq = {}, 0
+            if snapshot_sig is not None:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                data, seq = snapshot["data"], snapshot["seq"]
+            self.data, self.seq = data, seq
+            self._offset = self._journal_records = 0
+            self._snapshot_sig = snapshot_sig
+            self._unseen = None
+
+        size = os.path.getsize(self.journal_path)
+        if size < self._offset:
+            # Truncated by a compaction whose snapshot we already hold
+            self._offset = self._journal_records = 0
+        if size > self._offset:
+            good = self._offset
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn write at the end of the journal
+                    if not line.endswith(b"\n"):
+                        break
+                    good += len(line)
+                    self._journal_records += 1
+                    if record["seq"] <= self.seq:
+                        continue  # already in the snapshot
+                    self.seq = record["seq"]
+                    if record["op"] == "set":
+                        self.data[record["key"]] = record["value"]
+                    else:
+                        self.data.pop(record["key"], None)
+                    self._mark(record["key"])
+            if good < size:
+                # Only a writer that crashed mid-append leaves a partial line behind the lock
+                self._journal.truncate(good)
+            self._offset = good
+        self._journal_sig = _signature(self.journal_path)
+
+    def _mark(self, key):
+        if self._unseen is not None:
+            self._unseen.add(key)
+
+    def _write_snapshot(self, data, seq):
+        tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "data": data}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        _fsync_dir(self.snapshot_path)
+
+    # -- reads -------------------------------------------------------------
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def items(self):
+        """A copy of the current (key, value) pairs."""
+        with self._lock:
+            return list(self.data.items())
+
+    @property
+    def version(self):
+        """Sequence number of the last change seen; grows with every set or delete."""
+        return self.seq
+
+    def changed_on_disk(self):
+        """Whether another process may have written since the last replay (two stats, no reads)."""
+        return (_signature(self.journal_path) != self._journal_sig
+                or _signature(self.snapshot_path, inode=True) != self._snapshot_sig)
+
+    def refresh(self):
+        """Replay what other processes wrote since the last replay."""
+        with self._file_lock():
+            self._replay()
+
+    def changes(self):
+        """
+        Keys set or deleted, by any process, since the previous call, or None
+        when the map was (re)loaded as a whole and every key may have changed.
+        """
+        with self._lock:
+            changed, self._unseen = self._unseen, set()
+            return changed
+
+    # -- writes ------------------------------------------------------------
+
+    def set(self, key, value):
+        self._append("set", key, value)
+
+    def delete(self, key):
+        with self._file_lock():
+            self._replay()
+            if key in self.data:
+                self._append_locked("del", key)
+
+    def update(self, key, fn):
+        """
+        Atomically across processes: call fn with key's current value (None if
+        missing) and store what it returns, unless that is None. Returns the
+        stored value or None.
+        """
+        with self._file_lock():
+            self._replay()
+            value = fn(self.data.get(key))
+            if value is not None:
+                self._append_locked("set", key, value)
+            return value
+
+    def _append(self, op, key, value=None):
+        with self._file_lock():
+            self._replay()
+            self._append_locked(op, key, value)
+
+    def _append_locked(self, op, key, value=None):
+        self.seq += 1
+        record = {"seq": self.seq, "op": op, "key": key}
+        if op == "set":
+            record["value"] = value
+            self.data[key] = value
+        else:
+            self.data.pop(key, None)
+        self._mark(key)
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        self._journal.write(line)
+        self._journal.flush()
+        self._offset += len(line)
+        self._journal_sig = _signature(self.journal_path)
+        self._journal_records += 1
+        self._pending += 1
+        if (self._journal_records >= self.compact_records
+                or time.monotonic() - self._snapshot_time >= self.snapshot_interval):
+            self._compact_locked()
+        elif self._pending >= self.sync_every:
+            self.sync()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.sync_interval, self.sync)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def sync(self):
+        """fsync the journal records appended since the last sync."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending and not self._journal.closed:
+                os.fsync(self._journal.fileno())
+                self._pending = 0
+
+    def compact(self):
+        """Write the current map as the snapshot and start an empty journal."""
+        with self._file_lock():
+            self._replay()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        self.sync()
+        self._write_snapshot(self.data, self.seq)
+        # Records up to seq are in the snapshot, so a crash before the truncate only replays no-ops
+        self._journal.truncate(0)
+        os.fsync(self._journal.fileno())
+        self._offset = self._journal_records = 0
+        self._snapshot_sig = _signature(self.snapshot_path, inode=True)
+        self._journal_sig = _signature(self.journal_path)
+        self._snapshot_time = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._journal.closed:
+                self.sync()
+                self._journal.close()
+                self._lock_file.close()
@@ -0,0 +1,94 @@
+"""
+High-score leaderboard with an in-memory ranking kept up to date on submit.
+
+The scores live in a JournaledDict (see journal.py); next to it the
+Leaderboard keeps every player as (-score, name) in a sorted list. submit()
+finds and moves the player's entry with bisect (O(log n) comparisons) and
+appends one journal record, and top(k) is a slice of the first k entries, so
+rendering the board neither sorts nor reads files.
+
+Other processes (Streamlit replicas) write to the same journal. Before each
+read the Leaderboard compares the journal's and snapshot's (mtime, size)
+with what it last replayed, which costs two stats; when they moved it
+replays just the journal tail and moves the changed players (see
+JournaledDict.changes), and only a new snapshot from another process's
+compaction rebuilds the whole ranking.
+
+Usage:
+  board = Leaderboard(JournaledDict("leaderboard", legacy_path="leaderboard.json"))
+  board.submit("Player", 17)         # True: new personal best
+  board.top(10)                      # [("Player", {"score": 17, "date": ...}), ...]
+"""
+
+import bisect
+import threading
+from datetime import datetime
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class Leaderboard:
+    """Best score per player in store, ranked in memory."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._ranking = []
+        self._keys = {}  # name -> its key in _ranking
+
+    @staticmethod
+    def _key(name, entry):
+        return (-entry["score"], name)
+
+    def _rebuild(self):
+        self._keys = {name: self._key(name, entry) for name, entry in self.store.items()}
+        self._ranking = sorted(self._keys.values())
+
+    def _move(self, names):
+        """Re-rank names after their stored entries changed."""
+        for name in names:
+            old = self._keys.pop(name, None)
+            if old is not None:
+                del self._ranking[bisect.bisect_left(self._ranking, old)]
+            entry = self.store.get(name)
+            if entry is not None:
+                self._keys[name] = self._key(name, entry)
+                bisect.insort(self._ranking, self._keys[name])
+
+    def _fresh(self):
+        """The ranking, caught up with writes from other processes first."""
+        if self.store.changed_on_disk():
+            self.store.refresh()
+        changed = self.store.changes()
+        if changed is None:
+            self._rebuild()
+        elif changed:
+            self._move(changed)
+        return self._ranking
+
+    def __len__(self):
+        return len(self.store)
+
+    def get(self, name):
+        return self.store.get(name)
+
+    def top(self, k=10):
+        """The k best (name, entry) pairs, highest score first."""
+        with self._lock:
+            return [(name, self.store.get(name)) for _, name in self._fresh()[:k]]
+
+    def rank(self, name):
+        """1-based position of name, or None if it has no score."""
+        with self._lock:
+            self._fresh()
+            key = self._keys.get(name)
+            return None if key is None else bisect.bisect_left(self._ranking, key) + 1
+
+    def submit(self, name, score, date=None):
+        """Store score as name's best if it beats the current one. True when it did."""
+        entry = {"score": score, "date": date or datetime.now().strftime(DATE_FORMAT)}
+        with self._lock:
+            # Checked and written under the journal's lock, so a replica's better score is never overwritten
+            stored = self.store.update(name, lambda old: entry if old is None or old["score"] < score else None)
+            self._fresh()
+            return stored is not None
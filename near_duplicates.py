@@ -0,0 +1,144 @@
+"""
+Near-duplicate clustering for batch jobs with MinHash signatures and LSH banding.
+
+Each text is reduced to a MinHash signature over its character shingles;
+the signature is cut into bands and every band is looked up in a hash
+table, so a new text is only compared with the few earlier texts that
+share a band with it instead of with every text seen so far.
+
+Clustering is streaming "leader" clustering: the first text of a cluster is
+its representative, and a later text joins the first cluster whose
+representative it is estimated to match with Jaccard similarity of at least
+threshold. Clusters therefore never need a second pass over the input, and
+batch scoring can score just the representative and reuse its verdict for
+the members (see batch.iter_scored_records).
+
+Usage:
+  from near_duplicates import NearDuplicateIndex
+  index = NearDuplicateIndex(threshold=0.8)
+  cluster_ids = index.assign(["Aliens land in Texas!", "Aliens land in Texas!!", "Budget passes"])
+"""
+
+import zlib
+import numpy as np
+from detector import CLASS_LABELS, ERROR_LABEL, preview
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+SIMILARITY_THRESHOLD = 0.8
+UNCLUSTERED = -1
+
+# Largest prime below 2**32, so permuted hashes fit in uint32
+_PRIME = np.uint64(4294967291)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Character shingles of the case-folded, whitespace-collapsed text."""
+    text = " ".join(str(text).lower().split())
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    Streaming near-duplicate clusters. assign() gives every text a cluster
+    id; observe() adds a scored row to its cluster's verdict statistics,
+    which summary() reports. With representatives=True batch scoring scores
+    only the first text of each cluster.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM, bands=BANDS, representatives=False, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.representatives = representatives
+        rng = np.random.default_rng(seed)
+        # a < 2**31 keeps a * hash + b below 2**64
+        self._a = rng.integers(1, 2 ** 31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []  # representative signature per cluster
+        self.previews = []
+        self.sizes = []
+        self.counts = []
+        self.prob_sums = []
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def signature(self, text):
+        """MinHash signature (uint32[num_perm]) of one text."""
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def similarity(self, sig, cluster):
+        """Estimated Jaccard similarity between a signature and a cluster's representative."""
+        return float(np.mean(sig == self._signatures[cluster]))
+
+    def assign(self, texts):
+        """Cluster id of each text, creating clusters for texts unlike any representative so far."""
+        ids = []
+        for text in texts:
+            sig = self.signature(text)
+            keys = [sig[i * self.rows_per_band:(i + 1) * self.rows_per_band].tobytes() for i in range(self.bands)]
+            cluster, checked = None, set()
+            for bucket, key in zip(self._buckets, keys):
+                candidate = bucket.get(key)
+                if candidate is None or candidate in checked:
+                    continue
+                checked.add(candidate)
+                if self.similarity(sig, candidate) >= self.threshold:
+                    cluster = candidate
+                    break
+            if cluster is None:
+                cluster = len(self.sizes)
+                self._signatures.append(sig)
+                self.previews.append(preview(text))
+                self.sizes.append(0)
+                self.counts.append({label: 0 for label in list(CLASS_LABELS.values()) + [ERROR_LABEL]})
+                self.prob_sums.append(0.0)
+                for bucket, key in zip(self._buckets, keys):
+                    bucket.setdefault(key, cluster)
+            ids.append(cluster)
+        return ids
+
+    def observe(self, cluster, prediction, probability):
+        """Count a scored row towards its cluster's verdict statistics."""
+        if cluster == UNCLUSTERED:
+            return
+        self.sizes[cluster] += 1
+        self.counts[cluster][prediction] += 1
+        if probability is not None:
+            self.prob_sums[cluster] += probability
+
+    def summary(self, min_size=2):
+        """
+        One row per cluster with at least min_size members, largest first:
+        size, representative preview, per-label counts, mean P(REAL), the
+        majority verdict and the share of members that agree with it.
+        """
+        rows = []
+        for cluster, size in enumerate(self.sizes):
+            if size < min_size:
+                continue
+            counts = self.counts[cluster]
+            scored = size - counts[ERROR_LABEL]
+            verdict = max(counts, key=counts.get)
+            rows.append({
+                "cluster": cluster,
+                "size": size,
+                "representative": self.previews[cluster],
+                **{label.lower(): n for label, n in counts.items()},
+                "mean_probability": self.prob_sums[cluster] / scored if scored else None,
+                "verdict": verdict,
+                "agreement": counts[verdict] / size,
+            })
+        rows.sort(key=lambda r: (-r["size"], r["cluster"]))
+        return rows
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Bulk credibility reports with the fields of report_1771135174.json.
+
+Only the field names and layout follow that sample; the values are not
+compatible with it. The sample came from a different model (the shipped
+one scores its text 0.73, not 0.32) and from formulas that were not kept:
+its confidence_weight of 0.44 does not follow from its score and
+adversarial_score under the definitions below, which would give 0.27.
+Reports written here are comparable with each other, not with that file.
+
+Every report has the fields
+
+  text               the input text
+  prediction         FAKE / REAL (ERROR when the text cannot be analyzed)
+  score              P(REAL) from the model
+  level              HIGH / MODERATE / LOW certainty of the verdict, from
+                     confidence = |2 * score - 1| (see LEVELS)
+  bias_index         share of the words covered by heuristic matches
+                     (clickbait phrases, all-caps runs, !!!/?!), 0..1
+  adversarial_score  share of the decision margin |logit| carried by the
+                     single strongest term supporting the verdict, capped
+                     at 1; at 1 dropping that one term flips the verdict
+  confidence_weight  confidence * (1 - adversarial_score), rounded to two
+                     decimals: how much weight the verdict deserves
+
+The model part is computed for a whole chunk at once: one sparse transform,
+one predict_proba and decision_function, and the per-row strongest
+supporting term from the element-wise coef * tf-idf products of the CSR
+matrix. Only the heuristic scan runs per text.
+
+Usage:
+  python reports.py articles.csv -o reports.ndjson        # one JSON object per line
+  python reports.py articles.jsonl --per-item reports/     # one report_<id>.json per text
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import numpy as np
+from batch import INPUT_FORMATS, READ_CHUNK_ROWS, TEXT_COLUMN, detect_format, iter_records
+from detector import CLASS_LABELS, ERROR_LABEL, DEFAULT_CHUNK_SIZE, clean_text, load_detector
+
+REPORT_FIELDS = ["text", "prediction", "score", "level", "bias_index", "adversarial_score", "confidence_weight"]
+# (minimum confidence, level), checked in order
+LEVELS = [(0.6, "HIGH"), (0.3, "MODERATE"), (0.0, "LOW")]
+
+_WORD = re.compile(r"\b\w+\b")
+
+
+def level_for(confidence):
+    for minimum, level in LEVELS:
+        if confidence >= minimum:
+            return level
+    return LEVELS[-1][1]
+
+
+def bias_index(engine, text):
+    """Share of the words of text that fall inside a heuristic match."""
+    starts = [m.start() for m in _WORD.finditer(text)]
+    if not starts:
+        return 0.0
+    spans = [(m.start, m.end) for m in engine.scan(text)]
+    if not spans:
+        return 0.0
+    covered = sum(1 for s in starts if any(a <= s < b for a, b in spans))
+    return covered / len(starts)
+
+
+def strongest_support(X, coef, direction):
+    """
+    Per row of the CSR matrix X, the largest contribution coef * x pointing
+    in that row's direction (+1 towards REAL, -1 towards FAKE), or 0.
+    """
+    X = X.tocsr()
+    support = np.zeros(X.shape[0])
+    lengths = np.diff(X.indptr)
+    rows = np.flatnonzero(lengths)
+    if not len(rows):
+        return support
+    signed = coef[X.indices] * X.data * np.repeat(direction, lengths)
+    support[rows] = np.maximum(np.maximum.reduceat(signed, X.indptr[rows]), 0.0)
+    return support
+
+
+def credibility_reports(detector, texts, chunk_size=DEFAULT_CHUNK_SIZE):
+    """One report dict per text, in order; invalid texts get an ERROR report with null scores."""
+    texts = [str(t) for t in texts]
+    reports = []
+    coef = detector.index.coef
+    for start in range(0, len(texts), max(1, int(chunk_size))):
+        chunk = texts[start:start + chunk_size]
+        cleaned = [clean_text(t) for t in chunk]
+        valid = [t for t, error in cleaned if error is None]
+        if valid:
+            X = detector.vectorizer.transform(valid)
+            probs = detector.model.predict_proba(X)[:, 1]
+            margins = np.abs(detector.model.decision_function(X))
+            direction = np.where(probs >= 0.5, 1.0, -1.0)
+            support = strongest_support(X, coef, direction)
+            adversarial = np.minimum(1.0, np.divide(support, margins, out=np.ones_like(support), where=margins > 0))
+            confidence = np.abs(2 * probs - 1)
+            weights = np.round(confidence * (1 - adversarial), 2)
+        row = 0
+        for raw, (text, error) in zip(chunk, cleaned):
+            if error is not None:
+                reports.append({**dict.fromkeys(REPORT_FIELDS), "text": raw, "prediction": ERROR_LABEL})
+                continue
+            reports.append({
+                "text": raw,
+                "prediction": CLASS_LABELS[int(direction[row] > 0)],
+                "score": float(probs[row]),
+                "level": level_for(confidence[row]),
+                "bias_index": bias_index(detector.heuristics, raw),
+                "adversarial_score": float(adversarial[row]),
+                "confidence_weight": float(weights[row]),
+            })
+            row += 1
+    return reports
+
+
+def write_ndjson(reports, f):
+    for report in reports:
+        f.write(json.dumps(report, ensure_ascii=False) + "\n")
+
+
+def write_report_file(report, out_dir, name):
+    """Write one report as report_<name>.json, indented like report_1771135174.json."""
+    path = os.path.join(out_dir, f"report_{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write credibility reports for a file of articles.")
+    parser.add_argument("input", help="CSV, JSON lines or text file; '-' reads stdin")
+    parser.add_argument("--format", "-f", choices=INPUT_FORMATS, help="Input format (default: from the extension, txt for stdin)")
+    parser.add_argument("--text-column", default=TEXT_COLUMN, help="Column or JSON key holding the text")
+    parser.add_argument("--id-column", help="Column or JSON key naming per-item report files (default: row number)")
+    out = parser.add_mutually_exclusive_group()
+    out.add_argument("--output", "-o", default="-", help="NDJSON output file; '-' writes to stdout (default)")
+    out.add_argument("--per-item", metavar="DIR", help="Write one report_<id>.json per text into DIR instead")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE, help="Texts per vectorized chunk")
+    args = parser.parse_args()
+
+    stdin = args.input == "-"
+    in_format = args.format or ("txt" if stdin else detect_format(args.input, INPUT_FORMATS, "csv"))
+    detector = load_detector()
+    if args.per_item:
+        os.makedirs(args.per_item, exist_ok=True)
+        target = None
+    else:
+        target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    total = 0
+    try:
+        for ids, texts in iter_records(sys.stdin if stdin else args.input, in_format,
+                                       max(args.chunksize, READ_CHUNK_ROWS), args.text_column, args.id_column):
+            reports = credibility_reports(detector, texts, args.chunksize)
+            if target is not None:
+                write_ndjson(reports, target)
+            else:
+                for row_id, report in zip(ids, reports):
+                    write_report_file(report, args.per_item, row_id)
+            total += len(reports)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    finally:
+        if target is not None and target is not sys.stdout:
+            target.close()
+    print(f"Wrote {total:,} reports", file=sys.stderr)
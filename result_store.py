@@ -0,0 +1,110 @@
+"""
+Indexed on-disk store for batch results, for browsing them page by page.
+
+Results go into a SQLite table with indexes on the label, the confidence
+(probability of the predicted label) and P(REAL), so filtering by label and
+confidence range, sorting and paging run in the database and the app only
+ever holds, and sends to the browser, the rows of the current page.
+
+Usage:
+  store = ResultStore.build("results.sqlite", rows_iter)
+  frame, total = store.page(labels=["FAKE"], confidence=(0.8, 1.0), sort="confidence", descending=True, page=1)
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from batch import typed_frame
+
+SORT_COLUMNS = ("id", "confidence", "probability", "cluster")
+PAGE_SIZE = 50
+INSERT_BATCH = 5000
+
+
+class ResultStore:
+    """A results.sqlite file; build() writes one, page() and count() query it."""
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn:
+            self.columns = [row[1] for row in conn.execute("PRAGMA table_info(results)")]
+        self.clusters = "cluster" in self.columns
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    @classmethod
+    def build(cls, path, chunks, clusters=False):
+        """
+        Write every list of result rows in chunks to a new store at path
+        (replacing any existing file once complete) and index it.
+        """
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        columns = ["id", "text", "prediction", "probability", "confidence"] + (["cluster"] if clusters else [])
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.execute(
+                "CREATE TABLE results (id INTEGER PRIMARY KEY, text TEXT, prediction TEXT, probability REAL, "
+                "confidence REAL" + (", cluster INTEGER" if clusters else "") + ")"
+            )
+            sql = f"INSERT INTO results ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            for rows in chunks:
+                values = []
+                for row in rows:
+                    prob = row["probability"]
+                    confidence = None if prob is None else max(prob, 1 - prob)
+                    values.append((int(row["id"]), row["text"], row["prediction"], prob, confidence)
+                                  + ((int(row["cluster"]),) if clusters else ()))
+                for start in range(0, len(values), INSERT_BATCH):
+                    conn.executemany(sql, values[start:start + INSERT_BATCH])
+            conn.execute("CREATE INDEX idx_prediction_confidence ON results (prediction, confidence)")
+            conn.execute("CREATE INDEX idx_confidence ON results (confidence)")
+            conn.execute("CREATE INDEX idx_probability ON results (probability)")
+            if clusters:
+                conn.execute("CREATE INDEX idx_cluster ON results (cluster)")
+            conn.commit()
+        except BaseException:
+            conn.close()
+            os.remove(tmp)
+            raise
+        conn.close()
+        os.replace(tmp, path)
+        return cls(path)
+
+    def _where(self, labels, confidence):
+        clauses, params = [], []
+        if labels is not None:
+            clauses.append(f"prediction IN ({', '.join('?' * len(labels))})" if labels else "0")
+            params.extend(labels)
+        if confidence is not None:
+            # Rows that could not be scored have no confidence; the range does not apply to them
+            clauses.append("(confidence BETWEEN ? AND ? OR confidence IS NULL)")
+            params.extend(confidence)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, labels=None, confidence=None):
+        """Rows matching the filters."""
+        where, params = self._where(labels, confidence)
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def page(self, labels=None, confidence=None, sort="id", descending=False, page=1, page_size=PAGE_SIZE):
+        """
+        One page of rows matching the filters as a typed DataFrame (with the
+        confidence column), plus the total number of matching rows. labels limits the predictions shown,
+        confidence is an inclusive (low, high) range, page counts from 1.
+        """
+        if sort not in SORT_COLUMNS or (sort == "cluster" and not self.clusters):
+            raise ValueError(f"Cannot sort by '{sort}'.")
+        where, params = self._where(labels, confidence)
+        order = f"{sort} {'DESC' if descending else 'ASC'}" + (", id" if sort != "id" else "")
+        columns = self.columns
+        offset = (max(1, int(page)) - 1) * page_size
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM results{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [page_size, offset]
+            ).fetchall()
+        return typed_frame([dict(zip(columns, row)) for row in rows], columns), total
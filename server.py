@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Local HTTP scoring service for other programs (no Streamlit needed).
+
+A small asyncio HTTP/1.1 server on the standard library. It loads the model
+the same way the app's load_model does (the memory-mapped artifact when
+present, otherwise the pickles) and keeps connections alive between
+requests. Scoring runs on one dedicated thread, so the detector and its
+prediction cache are only ever used from a single thread while the event
+loop keeps reading and parsing requests.
+
+Endpoints:
+  GET  /health        {"status": "ok"}
+  POST /score         {"text": "..."} -> {"prediction": "FAKE", "probability": 0.12}
+                      (a text/plain body is taken as the text itself)
+  POST /score_batch   {"texts": ["...", ...]} or a JSON array, or an NDJSON
+                      body (Content-Type: application/x-ndjson) with one
+                      string or {"text": ...} per line. Answers
+                      {"results": [...]} in input order, or NDJSON when the
+                      request was NDJSON or Accept asks for it.
+
+Probabilities are P(REAL), as in the app. Texts that cannot be scored get
+prediction ERROR with a null probability (in a batch) or a 422 (for /score).
+
+Usage:
+  python server.py                      # http://127.0.0.1:8502
+  python server.py --host 0.0.0.0 --port 9000 --long length_weighted
+  python benchmark.py server --url http://127.0.0.1:8502 --connections 16
+"""
+
+import os
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from detector import AGGREGATION_STRATEGIES, DEFAULT_CACHE_SIZE, clean_text, load_detector
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_BATCH_TEXTS = 10000
+MAX_HEADER_LINES = 100
+KEEP_ALIVE_SECONDS = 30.0
+NDJSON_TYPE = "application/x-ndjson"
+JSON_TYPE = "application/json"
+
+
+class HTTPError(Exception):
+    """A request the server answers with an error status and message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = HTTPStatus(status)
+
+
+class Request:
+    def __init__(self, method, path, version, headers, body):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def content_type(self):
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f"Invalid JSON body: {e}") from None
+
+
+async def read_request(reader):
+    """The next Request on the connection, or None once the client has closed it."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line.") from None
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(431, "Too many header lines.")
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(411, "Chunked bodies are not supported; send a Content-Length.")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length.") from None
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"Body larger than {MAX_BODY_BYTES:,} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), path.split("?")[0], version.upper(), headers, body)
+
+
+def response_bytes(status, body, content_type=JSON_TYPE, keep_alive=True):
+    status = HTTPStatus(status)
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+class ScoringService:
+    """Routes requests to the detector; all scoring runs on one worker thread."""
+
+    def __init__(self, detector, long_strategy=None):
+        self.detector = detector
+        self.long_strategy = long_strategy
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def score_one(self, text):
+        """(result dict, error message) for one text."""
+        _, error = clean_text(text, max_length=None)
+        if error:
+            return None, error
+        if self.long_strategy:
+            label, prob = self.detector.score_batch([text], long_strategy=self.long_strategy)[0]
+        else:
+            label, prob = self.detector.analyze(text)
+        return {"prediction": label, "probability": prob}, None
+
+    def score_many(self, texts):
+        results = self.detector.score_batch(texts, long_strategy=self.long_strategy)
+        return [{"prediction": label, "probability": prob} for label, prob in results]
+
+    async def handle(self, request):
+        """(status, body bytes, content type) for a request."""
+        if request.path == "/health":
+            return 200, _dumps({"status": "ok"}), JSON_TYPE
+        if request.path not in ("/score", "/score_batch"):
+            raise HTTPError(404, f"No endpoint {request.path}.")
+        if request.method != "POST":
+            raise HTTPError(405, f"{request.path} only accepts POST.")
+
+        if request.path == "/score":
+            if request.content_type == "text/plain":
+                text = request.body.decode("utf-8", errors="replace")
+            else:
+                data = request.json()
+                text = data.get("text") if isinstance(data, dict) else data
+                if not isinstance(text, str):
+                    raise HTTPError(400, "Expected {\"text\": \"...\"}.")
+            result, error = await self._run(self.score_one, text)
+            if error:
+                raise HTTPError(422, error)
+            return 200, _dumps(result), JSON_TYPE
+
+        ndjson_in = request.content_type == NDJSON_TYPE
+        texts = self._batch_texts(request, ndjson_in)
+        if len(texts) > MAX_BATCH_TEXTS:
+            raise HTTPError(413, f"At most {MAX_BATCH_TEXTS:,} texts per batch.")
+        results = await self._run(self.score_many, texts)
+        if ndjson_in or NDJSON_TYPE in request.headers.get("accept", ""):
+            body = b"".join(_dumps(r) + b"\n" for r in results)
+            return 200, body, NDJSON_TYPE
+        return 200, _dumps({"results": results}), JSON_TYPE
+
+    @staticmethod
+    def _batch_texts(request, ndjson):
+        if ndjson:
+            try:
+                items = [json.loads(line) for line in request.body.decode("utf-8").splitlines() if line.strip()]
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise HTTPError(400, f"Invalid NDJSON body: {e}") from None
+        else:
+            data = request.json()
+            items = data.get("texts") if isinstance(data, dict) else data
+            if not isinstance(items, list):
+                raise HTTPError(400, "Expected {\"texts\": [...]} or a JSON array.")
+        texts = []
+        for item in items:
+            text = item.get("text") if isinstance(item, dict) else item
+            # Anything that is not a string is scored like an empty row: ERROR
+            texts.append(text if isinstance(text, str) else "")
+        return texts
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), KEEP_ALIVE_SECONDS)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as e:
+                    # The rest of the stream cannot be trusted after a bad request
+                    writer.write(response_bytes(e.status, _dumps({"error": str(e)}), keep_alive=False))
+                    break
+                if request is None:
+                    break
+                try:
+                    status, body, content_type = await self.handle(request)
+                except HTTPError as e:
+                    status, body, content_type = e.status, _dumps({"error": str(e)}), JSON_TYPE
+                writer.write(response_bytes(status, body, content_type, request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        print(f"Scoring service on http://{host}:{port} (POST /score, /score_batch)")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the fake news model over HTTP.")
+    parser.add_argument("--host", default=os.getenv("SCORING_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SCORING_PORT", DEFAULT_PORT)))
+    parser.add_argument("--long", choices=AGGREGATION_STRATEGIES, dest="long_strategy",
+                        help="Score texts longer than the model window in windows with this aggregation")
+    args = parser.parse_args()
+
+    cache_size = int(os.getenv("PREDICTION_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    service = ScoringService(load_detector(cache_size=cache_size), args.long_strategy)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """
 Train the Fake News Detection model (TF-IDF + Logistic Regression).
-Creates models/fake_news_model.pkl and models/vectorizer.pkl.
+Creates models/fake_news_model.pkl and models/vectorizer.pkl, plus a
+pickle-free, memory-mappable export in models/model_artifact/.
 
 Usage:
   python train_model.py                    # Use built-in demo data
   python train_model.py --data path.csv    # Use your own CSV (text, label columns)
+  python train_model.py --hashing          # Stateless hashed features (no vocabulary)
 """
 
 import os
@@ -17,6 +19,8 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
+from artifact import export_artifact
+from features import HashingTfidfVectorizer, DEFAULT_N_FEATURES
 
 # Built-in demo data (minimal but sufficient for a working model)
 DEMO_FAKE = [
@@ -77,7 +81,7 @@ def load_csv(path):
     return df[["text", "label"]].dropna()
 
 
-def train_and_save(data_path=None):
+def train_and_save(data_path=None, hashing=False, n_features=DEFAULT_N_FEATURES):
     if data_path and os.path.exists(data_path):
         print(f"Loading data from {data_path}...")
         df = load_csv(data_path)
@@ -94,8 +98,12 @@ def train_and_save(data_path=None):
         X, y, test_size=0.2, random_state=42, stratify=y
     )
 
-    print("Training TF-IDF vectorizer...")
-    vectorizer = TfidfVectorizer(max_features=10000, stop_words="english", ngram_range=(1, 2))
+    if hashing:
+        print(f"Fitting idf for hashed TF-IDF features ({n_features} buckets)...")
+        vectorizer = HashingTfidfVectorizer(n_features=n_features, stop_words="english", ngram_range=(1, 2))
+    else:
+        print("Training TF-IDF vectorizer...")
+        vectorizer = TfidfVectorizer(max_features=10000, stop_words="english", ngram_range=(1, 2))
     X_train_vec = vectorizer.fit_transform(X_train)
     X_test_vec = vectorizer.transform(X_test)
 
@@ -117,13 +125,18 @@ def train_and_save(data_path=None):
     with open(vec_path, "wb") as f:
         pickle.dump(vectorizer, f)
 
+    artifact_path = export_artifact(vectorizer, model, "models/model_artifact")
+
     print(f"\nSaved: {model_path}")
     print(f"Saved: {vec_path}")
+    print(f"Saved: {artifact_path}/")
     print("You can now run: streamlit run App.py")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", "-d", help="Path to CSV (columns: text, label)")
+    parser.add_argument("--hashing", action="store_true", help="Use stateless hashed features instead of a vocabulary")
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES, help="Hash buckets for --hashing")
     args = parser.parse_args()
-    train_and_save(args.data)
+    train_and_save(args.data, args.hashing, args.n_features)